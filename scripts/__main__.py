@@ -1,14 +1,57 @@
+import sys
+
+import daemon
+
+# Commands are forwarded to the build daemon, if it's running, before anything
+# else is imported, which is what keeps the client cheap to start.
+if __name__ == "__main__" and (exit_code := daemon.forward(sys.argv[1:])) is not None:
+    sys.exit(exit_code)
+
+import json
+import os
 import shutil
+import subprocess
+import time
+import traceback
+from collections.abc import Callable
+from collections.abc import Iterator
 from pathlib import Path
 from platform import system
 
 import click
 
 from about import get_mod_package_id
+from cooldowns import CooldownBenchmark
+from cooldowns import run_benchmark as run_cooldown_benchmark
+from corpus import Corpus
 from corpus import load_corpus
 from environment import Environment
+from game_log import ErrorSummary
+from game_log import LogParser
+from game_log import compile_filters
+from manifest import DEPLOYED_DIRECTORIES
+from manifest import DEPLOYED_FILES
+from manifest import Manifest
+from manifest import load_manifest
+from manifest import save_manifest
+from manifest import snapshot_sources
+from manifest import sync_targets
+from manifest import track_sources
 from mods_config import load_mods_config
 from mods_config import save_mods_config
+from product_catalog import Catalog
+from product_catalog import ProductBenchmark
+from product_catalog import ProductStore
+from product_catalog import ProductStoreWriter
+from product_catalog import run_benchmark as run_product_benchmark
+from schema_harness import PostgresBackend
+from schema_harness import SqliteBackend
+from schema_harness import format_report
+from schema_harness import run_harness
+from store import ArtifactStore
+from watch import InotifyWatcher
+from watch import create_watcher
+from watch import debounce as watch_debounced
 from typing import Final
 
 HARMONY_MOD_ID: Final[str] = "brrainz.harmony"
@@ -20,6 +63,10 @@ FILTERED_ASSEMBLIES: Final[set[str]] = {
     "NetEscapades.EnumGenerators.Attributes",
 }
 
+COMMON_LIBRARIES_PATH: Final[Path] = Path("Common/Libraries/Assemblies")
+COMMON_NATIVES_PATH: Final[Path] = Path("Common/Natives/Assemblies")
+FRAMEWORK_DIRECTORY: Final[str] = "net48"
+
 
 @click.group()
 def main():
@@ -34,49 +81,92 @@ def unnest():
     click.echo("Scanning releases folder for framework folders...")
     for category in releases_path.iterdir():
         for game_version in category.iterdir():
-            assemblies_directory: Path = game_version.joinpath("Assemblies")
-            framework_directory: Path = assemblies_directory.joinpath("net48")
+            _unnest_game_version(game_version)
 
-            if framework_directory.exists():
-                click.echo(f"Found framework directory {framework_directory}")
-                click.echo(f"  Copying to {assemblies_directory} ...", nl=False)
+    click.echo("Done!")
 
-                shutil.copytree(
-                    framework_directory, assemblies_directory, dirs_exist_ok=True
-                )
-                click.echo("Done!")
 
-                click.echo("  Removing framework directory....", nl=False)
-                shutil.rmtree(framework_directory)
-                click.echo("Done!")
+def _unnest_game_version(game_version: Path):
+    assemblies_directory: Path = game_version.joinpath("Assemblies")
+    framework_directory: Path = assemblies_directory.joinpath(FRAMEWORK_DIRECTORY)
 
-    click.echo("Done!")
+    if framework_directory.exists():
+        click.echo(f"Found framework directory {framework_directory}")
+        click.echo(f"  Copying to {assemblies_directory} ...", nl=False)
+
+        shutil.copytree(framework_directory, assemblies_directory, dirs_exist_ok=True)
+        click.echo("Done!")
+
+        click.echo("  Removing framework directory....", nl=False)
+        shutil.rmtree(framework_directory)
+        click.echo("Done!")
 
 
 @main.command("condense")
-def condense():
+@click.option(
+    "--store",
+    "use_store",
+    is_flag=True,
+    envvar="STREAMKIT_USE_STORE",
+    help="Materialize common assemblies from the shared artifact store.",
+)
+def condense(use_store: bool):
     """De-duplicates assemblies found in the "Releases" directory."""
 
     click.echo("Loading corpus...", nl=False)
     corpus = load_corpus(Path("Corpus.xml"))
     click.echo("Done!")
 
-    common_resources: dict[str, Path] = {}
-    common_native_resources: dict[str, Path] = {}
-    common_natives_path: Path = Path("Common/Natives/Assemblies")
-    common_libraries_path: Path = Path("Common/Libraries/Assemblies")
+    store: ArtifactStore | None = None
+    move = shutil.move
 
-    if not common_libraries_path.exists():
-        common_libraries_path.mkdir(parents=True, exist_ok=True)
+    if use_store:
+        store = ArtifactStore.create_instance()
+        move = store.move
+        click.echo(f"Using artifact store @ {store.root}")
 
-    if not common_natives_path.exists():
-        common_natives_path.mkdir(parents=True, exist_ok=True)
+    if not COMMON_LIBRARIES_PATH.exists():
+        COMMON_LIBRARIES_PATH.mkdir(parents=True, exist_ok=True)
+
+    if not COMMON_NATIVES_PATH.exists():
+        COMMON_NATIVES_PATH.mkdir(parents=True, exist_ok=True)
 
     click.echo("Mapping common assemblies...", nl=False)
+    common_resources, common_native_resources = _map_common_resources(corpus)
+    click.echo("Done!")
+
+    click.echo("Scanning assemblies in './Releases/' ...")
+
+    releases_path: Path = Path("Releases")
+    for category in releases_path.iterdir():
+        if category.name.casefold() == "bootstrap":
+            continue
+
+        for game_version in category.iterdir():
+            for assembly in game_version.joinpath("Assemblies").iterdir():
+                _condense_assembly(
+                    assembly, common_resources, common_native_resources, move
+                )
+
+    if store is not None:
+        store.save_index()
+
+    click.echo("Deduplicated assemblies in './Releases/'")
+
+
+def _map_common_resources(
+    corpus: Corpus,
+) -> tuple[dict[str, Path], dict[str, Path]]:
+    """Maps the names of the corpus' common assemblies and common native files
+    to their location on disk.
+    """
+    common_resources: dict[str, Path] = {}
+    common_native_resources: dict[str, Path] = {}
+
     for bundle in corpus.bundles:
         if (
             bundle.root.joinpath("Assemblies").resolve()
-            == common_libraries_path.resolve()
+            == COMMON_LIBRARIES_PATH.resolve()
         ):
             for resource in bundle.resources:
                 resource_path = Path(bundle.root)
@@ -87,7 +177,7 @@ def condense():
                 common_resources[resource.name] = resource_path.joinpath(resource.name)
         elif (
             bundle.root.joinpath("Assemblies").resolve()
-            == common_natives_path.resolve()
+            == COMMON_NATIVES_PATH.resolve()
         ):
             for resource in bundle.resources:
                 resource_path = Path(bundle.root)
@@ -99,200 +189,396 @@ def condense():
                     resource.name
                 )
 
-    click.echo("Done!")
+    return common_resources, common_native_resources
 
-    click.echo("Scanning assemblies in './Releases/' ...")
 
-    releases_path: Path = Path("Releases")
-    for category in releases_path.iterdir():
-        if category.name.casefold() == "bootstrap":
-            continue
+def _condense_assembly(
+    assembly: Path,
+    common_resources: dict[str, Path],
+    common_native_resources: dict[str, Path],
+    move: Callable[[Path, Path], object],
+):
+    """De-duplicates a single assembly found in the "Releases" directory."""
+    stem: str = assembly.stem
 
-        for game_version in category.iterdir():
-            for assembly in game_version.joinpath("Assemblies").iterdir():
-                stem: str = assembly.stem
+    if assembly.suffix == ".pdb":
+        return
 
-                if assembly.suffix == ".pdb":
-                    continue
+    if stem in PROVIDED_ASSEMBLIES:
+        assembly.unlink(missing_ok=True)
+        assembly.with_suffix(".pdb").unlink(missing_ok=True)
 
-                if stem in PROVIDED_ASSEMBLIES:
-                    assembly.unlink(missing_ok=True)
-                    assembly.with_suffix(".pdb").unlink(missing_ok=True)
+    if stem in FILTERED_ASSEMBLIES:
+        assembly.unlink(missing_ok=True)
+        assembly.with_suffix(".pdb").unlink(missing_ok=True)
 
-                if stem in FILTERED_ASSEMBLIES:
-                    assembly.unlink(missing_ok=True)
-                    assembly.with_suffix(".pdb").unlink(missing_ok=True)
+    if stem.casefold().startswith("StreamKit.Mod.Shared".casefold()):
+        assembly.unlink(missing_ok=True)
+        assembly.with_suffix(".pdb").unlink(missing_ok=True)
 
-                if stem.casefold().startswith("StreamKit.Mod.Shared".casefold()):
-                    assembly.unlink(missing_ok=True)
-                    assembly.with_suffix(".pdb").unlink(missing_ok=True)
+    if stem in KNOWN_LIBRARIES:
+        click.echo(f"  Located common library {assembly.name} in {assembly.parent}")
 
-                if stem in KNOWN_LIBRARIES:
-                    click.echo(
-                        f"  Located common library {assembly.name} in {assembly.parent}"
-                    )
+        if COMMON_LIBRARIES_PATH.joinpath(assembly.name).exists():
+            click.echo("    Removing potentially stale binary...", nl=False)
+            COMMON_LIBRARIES_PATH.joinpath(assembly.name).unlink(missing_ok=True)
+            click.echo("Done!")
 
-                    if common_libraries_path.joinpath(assembly.name).exists():
-                        click.echo("    Removing potentially stale binary...", nl=False)
-                        common_libraries_path.joinpath(assembly.name).unlink(
-                            missing_ok=True
-                        )
-                        click.echo("Done!")
+        click.echo(
+            f"    Moving to common directory {COMMON_LIBRARIES_PATH} ...",
+            nl=False,
+        )
+        move(assembly, COMMON_LIBRARIES_PATH)
+        click.echo("Done!")
 
-                    click.echo(
-                        f"    Moving to common directory {common_libraries_path} ...",
-                        nl=False,
-                    )
-                    shutil.move(assembly, common_libraries_path)
-                    click.echo("Done!")
-
-                    pdb_file = assembly.with_suffix(".pdb")
-
-                    if pdb_file.exists():
-                        if common_libraries_path.joinpath(pdb_file.name).exists():
-                            click.echo(
-                                "    Deleting potentially stale pdb file...", nl=False
-                            )
-                            common_libraries_path.joinpath(pdb_file.name).unlink(
-                                missing_ok=True
-                            )
-                            click.echo("Done!")
-
-                        click.echo(
-                            f"    Moving pdb file for {assembly.name} ...", nl=False
-                        )
-                        shutil.move(pdb_file, common_libraries_path)
-                        click.echo("Done!")
+        pdb_file = assembly.with_suffix(".pdb")
 
-                    continue
+        if pdb_file.exists():
+            if COMMON_LIBRARIES_PATH.joinpath(pdb_file.name).exists():
+                click.echo("    Deleting potentially stale pdb file...", nl=False)
+                COMMON_LIBRARIES_PATH.joinpath(pdb_file.name).unlink(missing_ok=True)
+                click.echo("Done!")
 
-                if stem in common_resources:
-                    click.echo(
-                        f"  Located common assembly {assembly.name} in {assembly.parent}"
-                    )
+            click.echo(f"    Moving pdb file for {assembly.name} ...", nl=False)
+            move(pdb_file, COMMON_LIBRARIES_PATH)
+            click.echo("Done!")
 
-                    if not common_libraries_path.joinpath(assembly.name).exists():
-                        click.echo(
-                            f"    Moving to common directory {common_libraries_path} ...",
-                            nl=False,
-                        )
-                        shutil.move(assembly, common_libraries_path)
-                        click.echo("Done!")
-                    else:
-                        click.echo("    Deleting duplicate assembly...", nl=False)
-                        assembly.unlink(missing_ok=True)
-                        click.echo("Done!")
-
-                    pdb_file = assembly.with_suffix(".pdb")
-
-                    if pdb_file.exists():
-                        if not common_libraries_path.joinpath(pdb_file.name).exists():
-                            click.echo(
-                                f"   Moving pdb file for {assembly.name} ...", nl=False
-                            )
-                            shutil.move(pdb_file, common_libraries_path)
-                            click.echo("Done!")
-                        else:
-                            click.echo("    Deleted duplicate pdb file...", nl=False)
-                            pdb_file.unlink()
-                            click.echo("Done!")
-
-                elif stem in common_native_resources and assembly.suffix in {
-                    ".dll",
-                    ".so",
-                    ".dylib",
-                }:
-                    click.echo(f"  Located common native file {assembly.stem}")
-
-                    if not common_natives_path.joinpath(
-                        f"{assembly.stem}.dll"
-                    ).exists():
-                        click.echo(f"   Moving {assembly.stem}.dll ...", nl=False)
-                        shutil.move(assembly.with_suffix(".dll"), common_natives_path)
-                        click.echo("Done!")
-                    else:
-                        click.echo("    Deleting duplicate native file...", nl=False)
-                        assembly.with_suffix(".dll").unlink(missing_ok=True)
-                        click.echo("Done!")
-
-                    if not common_natives_path.joinpath(f"{assembly.stem}.so").exists():
-                        click.echo(f"   Moving {assembly.stem}.so ...", nl=False)
-                        shutil.move(assembly.with_suffix(".so"), common_natives_path)
-                        click.echo("Done!")
-                    else:
-                        click.echo("    Deleted duplicate native file...", nl=False)
-                        assembly.with_suffix(".so").unlink(missing_ok=True)
-                        click.echo("Done!")
-
-                    if not common_natives_path.joinpath(
-                        f"{assembly.stem}.dylib"
-                    ).exists():
-                        click.echo(f"   Moving {assembly.stem}.dylib ...", nl=False)
-                        shutil.move(assembly.with_suffix(".dylib"), common_natives_path)
-                        click.echo("Done!")
-                    else:
-                        click.echo("    Deleted duplicate native file...", nl=False)
-                        assembly.with_suffix(".dylib").unlink(missing_ok=True)
-                        click.echo("Done!")
+        return
 
-    click.echo("Deduplicated assemblies in './Releases/'")
+    if stem in common_resources:
+        click.echo(f"  Located common assembly {assembly.name} in {assembly.parent}")
+
+        if not COMMON_LIBRARIES_PATH.joinpath(assembly.name).exists():
+            click.echo(
+                f"    Moving to common directory {COMMON_LIBRARIES_PATH} ...",
+                nl=False,
+            )
+            move(assembly, COMMON_LIBRARIES_PATH)
+            click.echo("Done!")
+        else:
+            click.echo("    Deleting duplicate assembly...", nl=False)
+            assembly.unlink(missing_ok=True)
+            click.echo("Done!")
+
+        pdb_file = assembly.with_suffix(".pdb")
+
+        if pdb_file.exists():
+            if not COMMON_LIBRARIES_PATH.joinpath(pdb_file.name).exists():
+                click.echo(f"   Moving pdb file for {assembly.name} ...", nl=False)
+                move(pdb_file, COMMON_LIBRARIES_PATH)
+                click.echo("Done!")
+            else:
+                click.echo("    Deleted duplicate pdb file...", nl=False)
+                pdb_file.unlink()
+                click.echo("Done!")
+
+    elif stem in common_native_resources and assembly.suffix in {
+        ".dll",
+        ".so",
+        ".dylib",
+    }:
+        click.echo(f"  Located common native file {assembly.stem}")
+
+        if not COMMON_NATIVES_PATH.joinpath(f"{assembly.stem}.dll").exists():
+            click.echo(f"   Moving {assembly.stem}.dll ...", nl=False)
+            move(assembly.with_suffix(".dll"), COMMON_NATIVES_PATH)
+            click.echo("Done!")
+        else:
+            click.echo("    Deleting duplicate native file...", nl=False)
+            assembly.with_suffix(".dll").unlink(missing_ok=True)
+            click.echo("Done!")
+
+        if not COMMON_NATIVES_PATH.joinpath(f"{assembly.stem}.so").exists():
+            click.echo(f"   Moving {assembly.stem}.so ...", nl=False)
+            move(assembly.with_suffix(".so"), COMMON_NATIVES_PATH)
+            click.echo("Done!")
+        else:
+            click.echo("    Deleted duplicate native file...", nl=False)
+            assembly.with_suffix(".so").unlink(missing_ok=True)
+            click.echo("Done!")
+
+        if not COMMON_NATIVES_PATH.joinpath(f"{assembly.stem}.dylib").exists():
+            click.echo(f"   Moving {assembly.stem}.dylib ...", nl=False)
+            move(assembly.with_suffix(".dylib"), COMMON_NATIVES_PATH)
+            click.echo("Done!")
+        else:
+            click.echo("    Deleted duplicate native file...", nl=False)
+            assembly.with_suffix(".dylib").unlink(missing_ok=True)
+            click.echo("Done!")
 
 
 @main.command("deploy")
-def deploy():
+@click.option(
+    "--store",
+    "use_store",
+    is_flag=True,
+    envvar="STREAMKIT_USE_STORE",
+    help="Materialize files from the shared artifact store instead of copying.",
+)
+@click.option(
+    "--target",
+    "targets",
+    multiple=True,
+    type=click.Path(file_okay=False, path_type=Path),
+    help="A mod directory to deploy to; may be given multiple times.",
+)
+@click.option(
+    "--full",
+    is_flag=True,
+    help="Ignore the deployment manifests, and redeploy every file.",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep watching the build output, and deploy changes as they're made.",
+)
+@click.option(
+    "--debounce",
+    type=int,
+    default=150,
+    show_default=True,
+    help="The number of milliseconds of quiet that ends a burst of changes.",
+)
+def deploy(
+    use_store: bool, targets: tuple[Path, ...], full: bool, watch: bool, debounce: int
+):
+    """Deploys the mod to each of its target mod directories."""
     click.echo("Deploying StreamKit...")
 
-    click.echo("Locating game install location...", nl=False)
-    env = Environment.create_instance()
-    click.echo("Done!")
+    store: ArtifactStore | None = None
 
-    mod_directory = env.game_install_path.joinpath("Mods", "StreamKit")
-    click.echo(f"RimWorld is installed @ {env.game_install_path}")
+    if use_store:
+        store = ArtifactStore.create_instance()
+        click.echo(f"Using artifact store @ {store.root}")
 
-    click.echo("Copying corpus file to mod directory...", nl=False)
-    shutil.copy(Path("Corpus.xml"), mod_directory)
-    click.echo("Done!")
+    mod_directories: list[Path] = list(targets)
 
-    click.echo("Copying load folders file to mod directory...", nl=False)
-    shutil.copy(Path("LoadFolders.xml"), mod_directory)
-    click.echo("Done!")
+    if not mod_directories:
+        click.echo("Locating game install location...", nl=False)
+        env = Environment.create_instance()
+        click.echo("Done!")
 
-    click.echo("Copying README file to mod directory...", nl=False)
-    shutil.copy(Path("README.md"), mod_directory)
-    click.echo("Done!")
+        click.echo(f"RimWorld is installed @ {env.game_install_path}")
+        mod_directories = env.mod_directories
 
-    click.echo("Copying LICENSE file to mod directory...", nl=False)
-    shutil.copy(Path("LICENSE"), mod_directory)
-    click.echo("Done!")
+    manifests: dict[Path, Manifest] = {}
 
-    click.echo("Copying About directory to mod directory...", nl=False)
-    shutil.copytree(Path("About"), mod_directory.joinpath("About"), dirs_exist_ok=True)
-    click.echo("Done!")
+    for mod_directory in mod_directories:
+        # A mod directory that no longer exists was wiped since it was last
+        # deployed to, so its manifest no longer describes it.
+        if full or not mod_directory.exists():
+            manifests[mod_directory] = {}
+        else:
+            manifests[mod_directory] = load_manifest(mod_directory)
 
-    click.echo("Deleting Releases directory in mod directory...", nl=False)
+        if manifests[mod_directory]:
+            continue
 
-    if mod_directory.joinpath("Releases").exists():
-        click.echo("Deleting Releases directory in mod directory...", nl=False)
-        shutil.rmtree(mod_directory.joinpath("Releases"))
-        click.echo("Done!")
+        # Without a manifest, there's no telling which files in the mod
+        # directory are stale, so the build output is deployed from scratch.
+        for directory in ("Releases", "Common"):
+            if mod_directory.joinpath(directory).exists():
+                click.echo(
+                    f"Deleting {directory} directory in {mod_directory} ...",
+                    nl=False,
+                )
+                shutil.rmtree(mod_directory.joinpath(directory))
+                click.echo("Done!")
 
-    click.echo("Copying Releases directory to mod directory...", nl=False)
-    shutil.copytree(
-        Path("Releases"), mod_directory.joinpath("Releases"), dirs_exist_ok=True
-    )
-    click.echo("Done!")
+    if store is not None:
+        for mod_directory in mod_directories:
+            if not store.is_same_volume(mod_directory):
+                click.echo(
+                    f"  {mod_directory} is on a different volume than the artifact"
+                    " store; files will be copied to it directly",
+                    err=True,
+                )
+            elif not store.can_reflink_to(mod_directory):
+                click.echo(
+                    f"  {mod_directory} is on a file system that doesn't support"
+                    " reflinks; files will be copied to it directly",
+                    err=True,
+                )
 
-    if mod_directory.joinpath("Common").exists():
-        click.echo("Deleting Common directory in mod directory...", nl=False)
-        shutil.rmtree(mod_directory.joinpath("Common"))
-        click.echo("Done!")
+    click.echo(f"Copying files to {len(mod_directories)} mod directories...")
+    manifests = _deploy_changes(manifests, snapshot_sources(), store)
+
+    if watch:
+        _watch_and_deploy(manifests, store, debounce / 1000)
+
+
+def _deploy_changes(
+    manifests: dict[Path, Manifest], current: Manifest, store: ArtifactStore | None
+) -> dict[Path, Manifest]:
+    """Deploys the changes between each mod directory's manifest and the
+    current snapshot, then reports the outcome for each mod directory.
+
+    Returns:
+        The mod directories mapped to the manifest of the files now deployed
+        to them.
+    """
+    results = sync_targets(manifests, current, store)
+
+    for mod_directory, result in results.items():
+        save_manifest(mod_directory, result.manifest)
+
+        click.echo(
+            f"  {mod_directory}: copied {len(result.copied)} files, removed"
+            f" {len(result.removed)} files in {result.elapsed * 1000:.0f}ms"
+        )
+
+        for path, reason in result.failed.items():
+            click.echo(f"    Could not deploy {path}: {reason}", err=True)
+
+    if store is not None:
+        store.save_index()
+
+    return {mod_directory: result.manifest for mod_directory, result in results.items()}
 
-    click.echo("Copying Common directory to mod directory...", nl=False)
-    shutil.copytree(
-        Path("Common"), mod_directory.joinpath("Common"), dirs_exist_ok=True
+
+def _watch_and_deploy(
+    manifests: dict[Path, Manifest],
+    store: ArtifactStore | None,
+    quiet_period: float,
+):
+    """Watches the build output for changes, and applies them to each mod
+    directory until interrupted.
+
+    Notes:
+        Only the steps affected by a change are run. Framework folders are
+        un-nested for the game versions that changed, and only the assemblies
+        that changed are condensed. The files copied to each mod directory are
+        then determined by comparing a snapshot of the deployed files against
+        the mod directory's manifest.
+    """
+    corpus_path: Path = Path("Corpus.xml")
+    common_resources, common_native_resources = _map_common_resources(
+        load_corpus(corpus_path)
     )
+    move = shutil.move if store is None else store.move
+
+    watcher = create_watcher(DEPLOYED_DIRECTORIES, DEPLOYED_FILES)
+    click.echo(f"Watching for changes using {watcher.name}; press Ctrl+C to stop...")
+
+    # Changes from a batch that failed are kept, so they're retried along with
+    # the next batch.
+    pending: set[Path] = set()
+
+    try:
+        for changes in watch_debounced(watcher, quiet_period):
+            started: float = time.perf_counter()
+            pending.update(changes)
+
+            try:
+                if corpus_path in pending:
+                    common_resources, common_native_resources = _map_common_resources(
+                        load_corpus(corpus_path)
+                    )
+
+                _apply_changes(pending, common_resources, common_native_resources, move)
+
+                click.echo(f"Deploying {len(pending)} changed paths...")
+                manifests = _deploy_changes(manifests, snapshot_sources(), store)
+            except Exception as e:
+                click.echo(f"Could not deploy changes: {e}", err=True)
+                click.echo("Waiting for further changes to retry...")
+
+                continue
+
+            pending.clear()
+            elapsed: float = (time.perf_counter() - started) * 1000
+            click.echo(f"Done in {elapsed:.0f}ms")
+    except KeyboardInterrupt:
+        click.echo("Stopped watching for changes")
+    finally:
+        watcher.close()
+
+
+def _apply_changes(
+    changes: set[Path],
+    common_resources: dict[str, Path],
+    common_native_resources: dict[str, Path],
+    move: Callable[[Path, Path], object],
+):
+    """Un-nests the game versions, and condenses the assemblies, affected by
+    the given changes.
+    """
+    releases_path: Path = Path("Releases")
+    game_versions: set[Path] = set()
+    assemblies: set[Path] = set()
+
+    for path in changes:
+        if not path.is_relative_to(releases_path):
+            continue
+
+        parts: tuple[str, ...] = path.relative_to(releases_path).parts
+
+        # Only files within "Releases/<category>/<version>/Assemblies" are
+        # affected by un-nesting or condensing.
+        if len(parts) < 4 or parts[2] != "Assemblies":
+            continue
+
+        game_version: Path = releases_path.joinpath(parts[0], parts[1])
+        game_versions.add(game_version)
+
+        if parts[0].casefold() == "bootstrap":
+            continue
+
+        nested: tuple[str, ...] = parts[3:]
+
+        # Files within the framework directory end up directly within
+        # "Assemblies" once it's un-nested. Files nested any deeper are never
+        # condensed.
+        if len(nested) == 2 and nested[0] == FRAMEWORK_DIRECTORY:
+            nested = nested[1:]
+
+        if len(nested) != 1:
+            continue
+
+        assembly: Path = game_version.joinpath("Assemblies", nested[0])
+
+        if assembly.suffix == ".pdb":
+            assembly = assembly.with_suffix(".dll")
+
+        assemblies.add(assembly)
+
+    for game_version in sorted(game_versions):
+        _unnest_game_version(game_version)
+
+    for assembly in sorted(assemblies):
+        if assembly.exists():
+            _condense_assembly(
+                assembly, common_resources, common_native_resources, move
+            )
+
+
+@main.command("store-gc")
+@click.option(
+    "--max-size",
+    type=int,
+    default=512,
+    show_default=True,
+    help="The maximum size, in megabytes, the store may occupy.",
+)
+@click.option(
+    "--max-blobs",
+    type=int,
+    default=None,
+    help="The maximum number of blobs the store may hold.",
+)
+def store_gc(max_size: int, max_blobs: int | None):
+    """Evicts the least recently used blobs from the shared artifact store."""
+    store = ArtifactStore.create_instance()
+
+    click.echo(f"Collecting garbage in artifact store @ {store.root} ...", nl=False)
+    statistics = store.collect_garbage(max_size * 1024 * 1024, max_blobs)
     click.echo("Done!")
 
+    click.echo(
+        f"  Evicted {statistics.evicted} blobs, reclaiming {statistics.reclaimed} bytes"
+    )
+    click.echo(f"  {statistics.blobs} blobs remain, occupying {statistics.size} bytes")
+
 
 @main.command("ensure-active")
 def update_mod_list():
@@ -361,6 +647,475 @@ def update_mod_list():
             save_mods_config(mods_config_file_path, config)
 
 
+@main.command("launch", context_settings={"ignore_unknown_options": True})
+@click.option(
+    "--executable",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="The executable to launch, instead of the game's executable.",
+)
+@click.option(
+    "--filter",
+    "filters",
+    multiple=True,
+    default=["StreamKit.*"],
+    show_default=True,
+    help="An assembly or namespace pattern errors must originate from.",
+)
+@click.option(
+    "--log",
+    "log_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=Path(".run", "logs", "RimWorld.log"),
+    show_default=True,
+    help="The file the full log is saved to.",
+)
+@click.option(
+    "--summary",
+    "summary_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=Path(".run", "logs", "errors.json"),
+    show_default=True,
+    help="The file the indexed summary of errors is saved to.",
+)
+@click.option(
+    "--ring-size",
+    type=int,
+    default=64,
+    show_default=True,
+    help="The number of recent log lines kept in memory.",
+)
+@click.option(
+    "--echo-all", is_flag=True, help="Echo every line of the log, not just errors."
+)
+@click.argument("arguments", nargs=-1, type=click.UNPROCESSED)
+@click.pass_context
+def launch(
+    ctx: click.Context,
+    executable: Path | None,
+    filters: tuple[str, ...],
+    log_path: Path,
+    summary_path: Path,
+    ring_size: int,
+    echo_all: bool,
+    arguments: tuple[str, ...],
+):
+    """Launches the game, and extracts the errors StreamKit logged from its
+    output.
+
+    Any arguments after the options are passed to the executable. If no
+    executable is given, the game is also passed "-logFile -", which makes
+    Unity write its log to stdout, unless the arguments already set the log
+    file.
+    """
+    working_directory: Path | None = None
+
+    if executable is None:
+        env = Environment.create_instance()
+        executable = env.game_install_path.joinpath("RimWorldWin64.exe")
+        working_directory = env.game_install_path
+
+        if not any(argument.lower() == "-logfile" for argument in arguments):
+            arguments = ("-logFile", "-", *arguments)
+
+    parser = LogParser(compile_filters(list(filters)), ring_size)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    last_summary: float = 0.0
+
+    click.echo(f"Launching {executable} ...")
+    process = subprocess.Popen(
+        [str(executable), *arguments],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        cwd=working_directory,
+        bufsize=1024 * 1024,
+    )
+
+    with log_path.open("wb") as log_file:
+        try:
+            for raw_line in process.stdout:
+                log_file.write(raw_line)
+
+                if echo_all:
+                    click.echo(raw_line.decode("utf-8", "replace"), nl=False)
+
+                error: ErrorSummary | None = parser.feed(raw_line)
+
+                if error is None:
+                    continue
+
+                _echo_error(error)
+
+                # The summary is rewritten as new errors are found, but not so
+                # often that a burst of errors slows the parser down.
+                if time.monotonic() - last_summary > 1.0:
+                    parser.write_summary(summary_path, log_path)
+                    last_summary = time.monotonic()
+        except KeyboardInterrupt:
+            click.echo("Stopping the game...")
+            process.terminate()
+
+        error = parser.finish()
+
+        if error is not None:
+            _echo_error(error)
+
+    exit_code: int = process.wait()
+    parser.write_summary(summary_path, log_path)
+
+    if exit_code != 0:
+        click.echo(f"The game exited with code {exit_code}; the log ended with:")
+
+        for line in parser.recent_lines[-16:]:
+            click.echo(f"  {line}")
+
+    click.echo(
+        f"Parsed {parser.line_count} lines, and found {len(parser.errors)} distinct"
+        f" errors; the summary was saved to {summary_path}"
+    )
+
+    ctx.exit(exit_code)
+
+
+def _echo_error(error: ErrorSummary):
+    click.echo(f"[Line {error.first_line}] {error.lines[0]}", err=True)
+
+    for line in error.lines[1:]:
+        click.echo(f"  {line.strip()}", err=True)
+
+
+@main.command("schema-harness")
+@click.option(
+    "--database",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=Path(".run", "schema-harness.sqlite3"),
+    show_default=True,
+    help="The SQLite database the schemas are loaded into; it's recreated.",
+)
+@click.option(
+    "--dsn",
+    help="The Postgres database the schemas are loaded into, instead of SQLite.",
+)
+@click.option("--users", type=int, default=1_000_000, show_default=True)
+@click.option("--sessions", type=int, default=50_000, show_default=True)
+@click.option("--interactions", type=int, default=5_000_000, show_default=True)
+@click.option(
+    "--viewers",
+    type=int,
+    default=50,
+    show_default=True,
+    help="The average number of users taking part in each session.",
+)
+@click.option(
+    "--iterations",
+    type=int,
+    default=200,
+    show_default=True,
+    help="The number of times each query is executed.",
+)
+@click.option(
+    "--apply-advice",
+    is_flag=True,
+    help="Create the suggested indexes, and run the queries again.",
+)
+@click.option(
+    "--report",
+    "report_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="The file the report is also saved to.",
+)
+def schema_harness(
+    database: Path,
+    dsn: str | None,
+    users: int,
+    sessions: int,
+    interactions: int,
+    viewers: int,
+    iterations: int,
+    apply_advice: bool,
+    report_path: Path | None,
+):
+    """Loads the SQL schemas with synthetic data, and reports on the latency
+    and query plans of the expected queries, and the indexes the schemas are
+    missing.
+    """
+    if dsn is not None:
+        try:
+            backend = PostgresBackend(dsn)
+        except ImportError as e:
+            raise click.UsageError(str(e))
+    else:
+        database.parent.mkdir(parents=True, exist_ok=True)
+        backend = SqliteBackend(database)
+
+    try:
+        report = run_harness(
+            backend,
+            users,
+            sessions,
+            interactions,
+            viewers_per_session=viewers,
+            iterations=iterations,
+            apply_advice=apply_advice,
+            log=click.echo,
+        )
+    finally:
+        backend.close()
+
+    lines: list[str] = format_report(report)
+
+    click.echo()
+
+    for line in lines:
+        click.echo(line)
+
+    if report_path is not None:
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+@main.command("cooldown-bench")
+@click.option("--users", type=int, default=100_000, show_default=True)
+@click.option("--interactions", type=int, default=1_000, show_default=True)
+@click.option(
+    "--operations",
+    type=int,
+    default=1_000_000,
+    show_default=True,
+    help="The number of cooldowns started.",
+)
+@click.option(
+    "--skip-memory", is_flag=True, help="Don't measure the memory cooldowns take."
+)
+def cooldown_bench(users: int, interactions: int, operations: int, skip_memory: bool):
+    """Benchmarks the reference cooldown table against the documented session
+    cooldowns model.
+    """
+    click.echo(
+        f"Replaying {operations} cooldowns across {users} users and"
+        f" {interactions} interactions ..."
+    )
+    result: CooldownBenchmark = run_cooldown_benchmark(
+        users, interactions, operations, measure_memory=not skip_memory
+    )
+
+    click.echo(f"  {result.live} cooldowns remain active")
+    click.echo(f"  {'':<26}{'table':>14}{'document':>14}")
+
+    rows: list[tuple[str, tuple[float, float]]] = [
+        ("Start (s)", result.start_seconds),
+        ("Expire (s)", result.expire_seconds),
+        ("Full serialize (s)", result.full_serialize_seconds),
+        ("Incremental serialize (s)", result.incremental_serialize_seconds),
+    ]
+
+    for label, (table, document) in rows:
+        click.echo(f"  {label:<26}{table:>14.3f}{document:>14.3f}")
+
+    if result.memory is not None:
+        uncached, cached, document = result.memory
+        click.echo(f"  {'Memory, uncached (bytes)':<26}{uncached:>14,}{document:>14,}")
+        click.echo(f"  {'Memory, cached (bytes)':<26}{cached:>14,}{document:>14,}")
+        click.echo(
+            "  Caching serialized cooldowns costs"
+            f" {cached - uncached:,} bytes to only re-encode what changed"
+        )
+
+    click.echo(f"  The serialized cooldowns take {result.document_size:,} bytes")
+
+
+@main.command("pack-products")
+@click.argument("source", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.argument("destination", type=click.Path(dir_okay=False, path_type=Path))
+@click.option(
+    "--catalog",
+    "catalog_path",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="The base catalog users are encoded against, instead of the most"
+    " common product list.",
+)
+@click.option(
+    "--catalog-version",
+    type=int,
+    default=1,
+    show_default=True,
+    help="The version of the catalog derived from the users' product lists.",
+)
+def pack_products(
+    source: Path, destination: Path, catalog_path: Path | None, catalog_version: int
+):
+    """Packs users' product lists into the compact shared-catalog encoding.
+
+    The source is either a JSON array of user product documents, or a file
+    with one document per line.
+    """
+    if catalog_path is not None:
+        with catalog_path.open("r", encoding="utf-8") as f:
+            catalog = Catalog.from_document(json.load(f))
+    else:
+        catalog = Catalog.from_documents(_read_user_products(source), catalog_version)
+
+    click.echo(
+        f"Packing {source} against catalog v{catalog.version}"
+        f" ({len(catalog.products)} products) ...",
+        nl=False,
+    )
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    staging_path: Path = destination.with_name(f"{destination.name}.tmp")
+
+    with staging_path.open("wb") as f:
+        with ProductStoreWriter(f, catalog) as writer:
+            for document in _read_user_products(source):
+                writer.add(document)
+
+    os.replace(staging_path, destination)
+    click.echo("Done!")
+
+    click.echo(
+        f"  {source.stat().st_size} bytes were packed into"
+        f" {destination.stat().st_size} bytes"
+    )
+
+
+@main.command("unpack-products")
+@click.argument("source", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.argument("destination", type=click.Path(dir_okay=False, path_type=Path))
+@click.option("--user", "user_ids", multiple=True, help="Only unpack the given users.")
+def unpack_products(source: Path, destination: Path, user_ids: tuple[str, ...]):
+    """Unpacks users' product lists into the documented shape, with one
+    document per line.
+    """
+    store = ProductStore.open(source)
+
+    if user_ids and (missing := [u for u in user_ids if u not in store]):
+        raise click.UsageError(f"Users {', '.join(missing)} weren't packed")
+
+    destination.parent.mkdir(parents=True, exist_ok=True)
+
+    with destination.open("w", encoding="utf-8") as f:
+        for user_id in user_ids or store:
+            f.write(json.dumps(store.get(user_id)))
+            f.write("\n")
+
+    click.echo(f"Unpacked {len(user_ids or store)} users to {destination}")
+
+
+def _read_user_products(path: Path) -> Iterator[dict]:
+    with path.open("r", encoding="utf-8") as f:
+        first: str = f.read(1)
+
+        while first.isspace():
+            first = f.read(1)
+
+        f.seek(0)
+
+        if first == "[":
+            yield from json.load(f)
+
+            return
+
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+@main.command("product-bench")
+@click.option("--users", type=int, default=100_000, show_default=True)
+@click.option("--catalog-size", type=int, default=150, show_default=True)
+def product_bench(users: int, catalog_size: int):
+    """Benchmarks the compact shared-catalog encoding against the documented
+    user products shape.
+    """
+    click.echo(
+        f"Encoding {users} users against a catalog of {catalog_size} products ..."
+    )
+    result: ProductBenchmark = run_product_benchmark(users, catalog_size)
+
+    click.echo(f"  {'':<22}{'compact':>16}{'documented':>16}")
+    click.echo(f"  {'Size (bytes)':<22}{result.size[0]:>16,}{result.size[1]:>16,}")
+    click.echo(
+        f"  {'Encode (users/s)':<22}{users / result.encode_seconds[0]:>16,.0f}"
+        f"{users / result.encode_seconds[1]:>16,.0f}"
+    )
+    click.echo(
+        f"  {'Decode one user (us)':<22}{result.lookup_seconds[0] * 1e6:>16.1f}"
+        f"{result.lookup_seconds[1] * 1e6:>16.1f}"
+    )
+    click.echo(f"  Opening the packed users took {result.open_seconds * 1000:.0f}ms")
+
+
+@main.command("daemon")
+@click.option("--stop", "should_stop", is_flag=True, help="Stops the running daemon.")
+def run_daemon(should_stop: bool):
+    """Runs the build daemon, which executes forwarded commands.
+
+    The daemon keeps the parsed corpus, the resolved environment, and a
+    snapshot of the build output warm between commands. While it's running,
+    the "unnest", "condense", "deploy", and "ensure-active" commands are
+    forwarded to it instead of being executed in-process.
+    """
+    if should_stop:
+        if daemon.stop():
+            click.echo("Stopped the build daemon")
+        else:
+            click.echo("The build daemon isn't running")
+
+        return
+
+    click.echo("Warming up...")
+
+    # Warming up is best-effort; anything that fails here will fail again, and
+    # be reported, when a command that needs it is executed.
+    for description, warm_up in (
+        ("corpus", lambda: load_corpus(Path("Corpus.xml"))),
+        ("mod's package id", lambda: get_mod_package_id(Path("About/About.xml"))),
+        ("environment", Environment.create_instance),
+    ):
+        try:
+            warm_up()
+        except Exception as e:
+            click.echo(f"  Could not load the {description}: {e}", err=True)
+
+    watcher = create_watcher(DEPLOYED_DIRECTORIES, DEPLOYED_FILES)
+
+    # A polling watcher scans every deployed directory each time it's drained,
+    # which is no cheaper than taking the snapshot from scratch.
+    if isinstance(watcher, InotifyWatcher):
+        track_sources(watcher)
+    else:
+        watcher.close()
+
+    click.echo("Done!")
+
+    address, _ = daemon.daemon_address()
+    click.echo(f"Build daemon listening @ {address}; press Ctrl+C to stop...")
+
+    try:
+        daemon.serve(_run_forwarded_command)
+    except KeyboardInterrupt:
+        click.echo("Stopped the build daemon")
+
+
+def _run_forwarded_command(args: list[str]) -> int:
+    """Executes a command forwarded to the build daemon, and returns its exit
+    code.
+    """
+    try:
+        main.main(args=args, prog_name="scripts", standalone_mode=True)
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+
+        click.echo(e.code, err=True)
+
+        return 1
+    except Exception:
+        traceback.print_exc()
+
+        return 1
+
+    return 0
+
+
 if __name__ == "__main__":
     print("Executing...")
     main()
@@ -6,7 +6,10 @@ file.
 from pathlib import Path
 from xml.etree import ElementTree as ET
 
+from cache import cached_on_files
 
+
+@cached_on_files(lambda about_file_path: [about_file_path])
 def get_mod_package_id(about_file_path: Path) -> str:
     """Obtains the mod's package id from its About.xml file.
 
@@ -0,0 +1,65 @@
+"""
+Contains a decorator that memoizes functions whose results are derived from the
+contents of files on disk. A memoized result is reused until one of the files
+it was derived from changes.
+"""
+
+import functools
+import os
+from collections.abc import Callable
+from collections.abc import Iterable
+from pathlib import Path
+
+__all__ = ["cached_on_files"]
+
+_Signature = tuple[tuple[str, int, int] | None, ...]
+
+
+def cached_on_files(files: Callable[..., Iterable[Path]]):
+    """Memoizes a function until any of the files its result depends on change.
+
+    Args:
+        files:
+            A function that's given the same arguments as the memoized
+            function, and returns the files its result depends on.
+    Notes:
+        A file is considered changed when its size or modification time
+        differs from when the result was memoized. Files are resolved against
+        the current working directory, so the same relative path in two
+        different directories is treated as two different files.
+
+        This is mostly useful for long-running processes, like the build
+        daemon, where the same files are parsed over and over again.
+    """
+
+    def decorator(function):
+        results: dict[tuple, tuple[_Signature, object]] = {}
+
+        @functools.wraps(function)
+        def wrapper(*args):
+            signature: _Signature = tuple(_signature(p) for p in files(*args))
+            key: tuple = (os.getcwd(), *args)
+            entry = results.get(key)
+
+            if entry is not None and entry[0] == signature:
+                return entry[1]
+
+            result = function(*args)
+            results[key] = (signature, result)
+
+            return result
+
+        wrapper.cache_clear = results.clear
+
+        return wrapper
+
+    return decorator
+
+
+def _signature(path: Path) -> tuple[str, int, int] | None:
+    try:
+        stat = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+    return str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns
@@ -0,0 +1,820 @@
+"""
+Contains a reference implementation of the cooldowns modelled by
+"schemas/session-cooldowns.json5", which tracks when each interaction of a
+session becomes available again, both to every user and to individual users.
+
+Notes:
+    The documented model is one nested document per session, which grows with
+    every user that's ever put on cooldown, and has to be rewritten whenever a
+    cooldown starts or expires. This implementation keeps the same semantics,
+    but stores cooldowns compactly, expires them without scanning, and only
+    re-encodes the interactions whose cooldowns changed when it's serialized to
+    the documented shape.
+"""
+
+import heapq
+import json
+import random
+import time
+import tracemalloc
+import uuid
+from array import array
+from collections.abc import Iterable
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from functools import lru_cache
+from typing import Final
+
+from interner import CompactInterner
+from interner import Interner
+
+__all__ = [
+    "CooldownTable",
+    "CooldownBenchmark",
+    "format_timestamp",
+    "parse_timestamp",
+    "run_benchmark",
+]
+
+_EPOCH: Final[datetime] = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# The number of milliseconds covered by each bucket of the timer wheel.
+_BUCKET_WIDTH: Final[int] = 1000
+
+# Timer wheel entries pack the cooldown's interaction and user into a single
+# integer. The user is offset by one, so zero can stand for the global cooldown.
+_USER_BITS: Final[int] = 32
+_USER_MASK: Final[int] = (1 << _USER_BITS) - 1
+
+_EMPTY: Final[int] = -1
+_MIN_BITS: Final[int] = 3
+_GOLDEN_RATIO: Final[int] = 0x9E3779B97F4A7C15
+
+
+class _UserCooldowns:
+    """An open-addressing hash table mapping interned user ids to the expiry of
+    their cooldown, backed by a pair of arrays, so each cooldown takes twelve
+    bytes per slot instead of a dictionary entry and two boxed integers.
+
+    The table is kept between a quarter and three quarters full, growing as
+    cooldowns start and shrinking as they expire.
+    """
+
+    __slots__ = ("users", "expires", "size", "bits")
+
+    def __init__(self, bits: int = _MIN_BITS):
+        self.users: array = array("i", [_EMPTY]) * (1 << bits)
+        self.expires: array = array("q", bytes(8 << bits))
+        self.size: int = 0
+        self.bits: int = bits
+
+    def find(self, user: int) -> int:
+        """Returns the position of the given user, or of the empty position
+        they would be inserted at.
+        """
+        users: array = self.users
+        mask: int = len(users) - 1
+        position: int = (user * _GOLDEN_RATIO & 0xFFFFFFFFFFFFFFFF) >> 64 - self.bits
+
+        while users[position] != user and users[position] != _EMPTY:
+            position = position + 1 & mask
+
+        return position
+
+    def set(self, user: int, expires_on: int) -> bool:
+        """Sets the expiry of the given user's cooldown, and returns whether
+        the user didn't already have one.
+        """
+        users: array = self.users
+        mask: int = len(users) - 1
+        position: int = (user * _GOLDEN_RATIO & 0xFFFFFFFFFFFFFFFF) >> 64 - self.bits
+
+        # The lookup is inlined, as this is on the path of every cooldown
+        # started.
+        while (current := users[position]) != user:
+            if current == _EMPTY:
+                if (self.size + 1) * 4 > len(users) * 3:
+                    self._resize(self.bits + 1)
+                    position = self.find(user)
+
+                self.users[position] = user
+                self.expires[position] = expires_on
+                self.size += 1
+
+                return True
+
+            position = position + 1 & mask
+
+        self.expires[position] = expires_on
+
+        return False
+
+    def remove(self, position: int):
+        users: array = self.users
+        expires: array = self.expires
+        mask: int = len(users) - 1
+        shift: int = 64 - self.bits
+        hole: int = position
+        current: int = position
+
+        # Entries after the removed one are shifted back into the hole, unless
+        # that would move them before their home position, so lookups never
+        # need to skip over deleted entries.
+        while True:
+            current = current + 1 & mask
+            user: int = users[current]
+
+            if user == _EMPTY:
+                break
+
+            home: int = (user * _GOLDEN_RATIO & 0xFFFFFFFFFFFFFFFF) >> shift
+
+            if (current - home & mask) >= (current - hole & mask):
+                users[hole] = user
+                expires[hole] = expires[current]
+                hole = current
+
+        users[hole] = _EMPTY
+        self.size -= 1
+
+        if self.size * 8 < len(users) and self.bits > _MIN_BITS:
+            self._resize(self.bits - 1)
+
+    def items(self) -> Iterator[tuple[int, int]]:
+        for user, expires_on in zip(self.users, self.expires):
+            if user != _EMPTY:
+                yield user, expires_on
+
+    def _resize(self, bits: int):
+        previous: list[tuple[int, int]] = list(self.items())
+
+        self.bits = bits
+        self.users = array("i", [_EMPTY]) * (1 << self.bits)
+        self.expires = array("q", bytes(8 << self.bits))
+
+        for user, expires_on in previous:
+            position: int = self.find(user)
+            self.users[position] = user
+            self.expires[position] = expires_on
+
+
+class CooldownTable:
+    """The cooldowns of a single session.
+
+    Timestamps are the number of milliseconds since the Unix epoch, in UTC. A
+    cooldown is active until the current time reaches its expiry.
+
+    Notes:
+        Interaction and user ids are interned. The global cooldowns are kept in
+        an array indexed by interaction, and the user cooldowns of each
+        interaction in an array-backed hash table, which shrinks as its
+        cooldowns expire. Users are counted against the cooldowns they have,
+        and released once their last one is removed, so the table only grows
+        with the users currently on cooldown, rather than every user it has
+        ever seen. Cooldowns are also filed into the one-second bucket of a
+        timer wheel they expire in, so expiring cooldowns only touches the
+        buckets that have come due. Wheel entries made stale by a cooldown
+        being extended or cleared are skipped when their bucket comes due, and
+        are discarded in bulk once they outnumber the live ones.
+
+        As users are looked up in Python rather than through dictionaries,
+        starting a cooldown is several times slower than in the documented
+        model, at around a microsecond, in exchange for taking less memory.
+
+        By default, the encoded cooldowns of each interaction are kept between
+        calls to `serialize`, which trades holding roughly another copy of the
+        serialized cooldowns in memory for only re-encoding what changed.
+        Tables that are rarely serialized can opt out of keeping them.
+    """
+
+    def __init__(self, session_id: str, cache_serialized: bool = True):
+        self.session_id: str = session_id
+        self.cache_serialized: bool = cache_serialized
+
+        self._interactions: Interner = Interner()
+        self._users: CompactInterner = CompactInterner()
+        self._user_references: array = array("i")
+
+        self._global_expires: array = array("q")
+        self._user_expires: list[_UserCooldowns] = []
+        self._size: int = 0
+
+        self._wheel: dict[int, array] = {}
+        self._buckets: list[int] = []
+        self._wheel_size: int = 0
+
+        self._fragments: list[str | None] = []
+        self._dirty: set[int] = set()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def start(self, interaction: str, expires_on: int, user: str | None = None):
+        """Puts an interaction on cooldown, replacing any existing cooldown.
+
+        Args:
+            interaction:
+                The id of the interaction being put on cooldown.
+            expires_on:
+                When the cooldown expires.
+            user:
+                The id of the user the cooldown applies to, or `None` if it
+                applies to every user.
+        """
+        index: int = self._interactions.intern(interaction)
+
+        if index == len(self._user_expires):
+            self._global_expires.append(0)
+            self._user_expires.append(_UserCooldowns())
+            self._fragments.append(None)
+
+        if user is None:
+            if self._global_expires[index] == 0:
+                self._size += 1
+
+            self._global_expires[index] = expires_on
+            entry: int = index << _USER_BITS
+        else:
+            user_index: int = self._users.intern(user)
+            references: array = self._user_references
+
+            if user_index == len(references):
+                references.append(0)
+
+            if self._user_expires[index].set(user_index, expires_on):
+                references[user_index] += 1
+                self._size += 1
+
+            entry = index << _USER_BITS | user_index + 1
+
+        self._file(entry, expires_on)
+        self._wheel_size += 1
+        self._dirty.add(index)
+
+    def clear(self, interaction: str, user: str | None = None) -> bool:
+        """Removes a cooldown before it expires.
+
+        Args:
+            interaction:
+                The id of the interaction whose cooldown is being removed.
+            user:
+                The id of the user whose cooldown is being removed, or `None`
+                if the global cooldown is being removed.
+        Returns:
+            Whether the interaction was on cooldown.
+        """
+        index: int | None = self._interactions.get(interaction)
+
+        if index is None:
+            return False
+
+        if user is None:
+            return self._remove(index, 0)
+
+        user_index: int | None = self._users.get(user)
+
+        return user_index is not None and self._remove(index, user_index + 1)
+
+    def expires_on(self, interaction: str, user: str | None = None) -> int | None:
+        """Returns when a cooldown expires, or `None` if there's no such
+        cooldown.
+
+        Args:
+            interaction:
+                The id of the interaction.
+            user:
+                The id of the user, or `None` for the interaction's global
+                cooldown.
+        """
+        index: int | None = self._interactions.get(interaction)
+
+        if index is None:
+            return None
+
+        if user is None:
+            return self._global_expires[index] or None
+
+        user_index: int | None = self._users.get(user)
+
+        if user_index is None:
+            return None
+
+        cooldowns: _UserCooldowns = self._user_expires[index]
+        position: int = cooldowns.find(user_index)
+
+        if cooldowns.users[position] == _EMPTY:
+            return None
+
+        return cooldowns.expires[position]
+
+    def is_active(self, interaction: str, user: str | None, now: int) -> bool:
+        """Returns whether an interaction is on cooldown for a user, either
+        because of its global cooldown or the user's own.
+
+        Args:
+            interaction:
+                The id of the interaction.
+            user:
+                The id of the user, or `None` to only check the global cooldown.
+            now:
+                The current time.
+        """
+        expires_on: int | None = self.expires_on(interaction)
+
+        if expires_on is not None and expires_on > now:
+            return True
+
+        if user is None:
+            return False
+
+        expires_on = self.expires_on(interaction, user)
+
+        return expires_on is not None and expires_on > now
+
+    def expire(self, now: int) -> int:
+        """Removes every cooldown that expired by the given time.
+
+        Args:
+            now:
+                The current time.
+        Returns:
+            The number of cooldowns that were removed.
+        """
+        buckets: list[int] = self._buckets
+        current: int = now // _BUCKET_WIDTH
+        count: int = 0
+
+        while buckets and buckets[0] <= current:
+            bucket: int = buckets[0]
+            entries: array = self._wheel[bucket]
+            remaining: array = array("q")
+
+            for entry in entries:
+                expires_on: int | None = self._entry_expires_on(entry)
+
+                # The entry is stale if the cooldown was cleared, or restarted
+                # with an expiry in a different bucket.
+                if expires_on is None or expires_on // _BUCKET_WIDTH != bucket:
+                    continue
+
+                if expires_on > now:
+                    remaining.append(entry)
+                elif self._remove(entry >> _USER_BITS, entry & _USER_MASK):
+                    count += 1
+
+            self._wheel_size -= len(entries) - len(remaining)
+
+            if remaining:
+                self._wheel[bucket] = remaining
+
+                break
+
+            del self._wheel[bucket]
+            heapq.heappop(buckets)
+
+        if self._wheel_size > 2 * self._size + 1024:
+            self._rebuild_wheel()
+
+        return count
+
+    def serialize(self) -> str:
+        """Serializes the cooldowns to the documented JSON shape.
+
+        Notes:
+            If `cache_serialized` is set, the encoded cooldowns of each
+            interaction are kept between calls, and only the interactions
+            whose cooldowns changed since the last call are re-encoded.
+            Otherwise, every interaction is encoded on each call.
+        """
+        if self.cache_serialized:
+            for index in self._dirty:
+                self._fragments[index] = self._encode_interaction(index)
+
+            fragments: Iterable[str | None] = self._fragments
+        else:
+            fragments = map(self._encode_interaction, range(len(self._user_expires)))
+
+        self._dirty.clear()
+        cooldowns: str = ", ".join(f for f in fragments if f is not None)
+
+        return f'{{"id": {json.dumps(self.session_id)}, "cooldowns": {{{cooldowns}}}}}'
+
+    def to_document(self) -> dict:
+        """Returns the cooldowns in the documented shape."""
+        cooldowns: dict[str, dict] = {}
+
+        for index, user_cooldowns in enumerate(self._user_expires):
+            global_expires_on: int = self._global_expires[index]
+
+            if not global_expires_on and not user_cooldowns.size:
+                continue
+
+            cooldowns[self._interactions[index]] = {
+                "global_expires_on": (
+                    format_timestamp(global_expires_on) if global_expires_on else None
+                ),
+                "user_expires_on": {
+                    self._users[user]: format_timestamp(expires_on)
+                    for user, expires_on in user_cooldowns.items()
+                },
+            }
+
+        return {"id": self.session_id, "cooldowns": cooldowns}
+
+    @classmethod
+    def from_document(cls, document: dict) -> "CooldownTable":
+        """Loads cooldowns from the documented shape.
+
+        Args:
+            document:
+                The session's cooldowns, as decoded from JSON.
+        """
+        table = cls(document["id"])
+
+        for interaction, cooldown in document.get("cooldowns", {}).items():
+            if cooldown.get("global_expires_on") is not None:
+                table.start(interaction, parse_timestamp(cooldown["global_expires_on"]))
+
+            for user, expires_on in cooldown.get("user_expires_on", {}).items():
+                table.start(interaction, parse_timestamp(expires_on), user)
+
+        return table
+
+    def _entry_expires_on(self, entry: int) -> int | None:
+        index: int = entry >> _USER_BITS
+        user: int = entry & _USER_MASK
+
+        if user == 0:
+            return self._global_expires[index] or None
+
+        cooldowns: _UserCooldowns = self._user_expires[index]
+        position: int = cooldowns.find(user - 1)
+
+        if cooldowns.users[position] == _EMPTY:
+            return None
+
+        return cooldowns.expires[position]
+
+    def _remove(self, index: int, user: int) -> bool:
+        if user == 0:
+            if not self._global_expires[index]:
+                return False
+
+            self._global_expires[index] = 0
+        else:
+            cooldowns: _UserCooldowns = self._user_expires[index]
+            position: int = cooldowns.find(user - 1)
+
+            if cooldowns.users[position] == _EMPTY:
+                return False
+
+            cooldowns.remove(position)
+            self._user_references[user - 1] -= 1
+
+            if not self._user_references[user - 1]:
+                self._users.release(user - 1)
+
+        self._size -= 1
+        self._dirty.add(index)
+
+        return True
+
+    def _rebuild_wheel(self):
+        self._wheel = {}
+        self._buckets = []
+
+        for index, user_cooldowns in enumerate(self._user_expires):
+            if self._global_expires[index]:
+                self._file(index << _USER_BITS, self._global_expires[index])
+
+            for user, expires_on in user_cooldowns.items():
+                self._file(index << _USER_BITS | user + 1, expires_on)
+
+        self._wheel_size = self._size
+
+    def _file(self, entry: int, expires_on: int):
+        bucket: int = expires_on // _BUCKET_WIDTH
+        entries: array | None = self._wheel.get(bucket)
+
+        if entries is None:
+            entries = self._wheel[bucket] = array("q")
+            heapq.heappush(self._buckets, bucket)
+
+        entries.append(entry)
+
+    def _encode_interaction(self, index: int) -> str | None:
+        global_expires_on: int = self._global_expires[index]
+        user_cooldowns: _UserCooldowns = self._user_expires[index]
+
+        if not global_expires_on and not user_cooldowns.size:
+            return None
+
+        users: CompactInterner = self._users
+        encoded_global: str = (
+            f'"{format_timestamp(global_expires_on)}"' if global_expires_on else "null"
+        )
+        encoded_users: str = ", ".join(
+            f'{users.encoded(user)}: "{format_timestamp(expires_on)}"'
+            for user, expires_on in user_cooldowns.items()
+        )
+
+        return (
+            f"{self._interactions.encoded(index)}: "
+            f'{{"global_expires_on": {encoded_global},'
+            f' "user_expires_on": {{{encoded_users}}}}}'
+        )
+
+
+@lru_cache(maxsize=4096)
+def format_timestamp(timestamp: int) -> str:
+    """Formats a timestamp, in milliseconds since the Unix epoch, as an ISO 8601
+    date and time in UTC.
+    """
+    moment: datetime = _EPOCH + timedelta(milliseconds=timestamp)
+
+    return moment.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def parse_timestamp(value: str) -> int:
+    """Parses an ISO 8601 date and time into milliseconds since the Unix epoch.
+    Dates and times without an offset are assumed to be in UTC.
+    """
+    moment: datetime = datetime.fromisoformat(value)
+
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+
+    return (moment - _EPOCH) // timedelta(milliseconds=1)
+
+
+@dataclass(slots=True)
+class CooldownBenchmark:
+    """Represents the outcome of benchmarking the cooldown table against the
+    documented model, stored as plain nested dictionaries.
+
+    Attributes:
+        operations:
+            The number of cooldowns started.
+        live:
+            The number of cooldowns active at the end of the benchmark.
+        start_seconds:
+            The number of seconds spent starting cooldowns, for the table and
+            the documented model respectively.
+        expire_seconds:
+            The number of seconds spent expiring cooldowns, for the table and
+            the documented model respectively.
+        full_serialize_seconds:
+            The number of seconds it took to serialize every cooldown, for the
+            table and the documented model respectively.
+        incremental_serialize_seconds:
+            The number of seconds it took to serialize the cooldowns again
+            after a handful changed, for the table and the documented model
+            respectively.
+        memory:
+            The number of bytes held after the cooldowns were started and
+            serialized once, for the table without and with its serialize
+            cache and the documented model respectively, or `None` if it
+            wasn't measured.
+        document_size:
+            The size, in bytes, of the serialized cooldowns.
+    """
+
+    operations: int
+    live: int
+    start_seconds: tuple[float, float]
+    expire_seconds: tuple[float, float]
+    full_serialize_seconds: tuple[float, float]
+    incremental_serialize_seconds: tuple[float, float]
+    memory: tuple[int, int, int] | None
+    document_size: int
+
+
+def run_benchmark(
+    users: int = 100_000,
+    interactions: int = 1_000,
+    operations: int = 1_000_000,
+    expire_interval: int = 1_000,
+    measure_memory: bool = True,
+    seed: int = 0,
+) -> CooldownBenchmark:
+    """Replays a synthetic stream of cooldowns against both the cooldown table
+    and the documented model.
+
+    Args:
+        users:
+            The number of distinct users taking part in the session.
+        interactions:
+            The number of distinct interactions in the session.
+        operations:
+            The number of cooldowns started.
+        expire_interval:
+            The number of cooldowns started between each expiry pass.
+        measure_memory:
+            Whether the memory held for the cooldowns is measured, which
+            replays the stream again with allocations being traced. Whatever
+            serializing keeps around is included.
+        seed:
+            The seed for the synthetic stream.
+    Notes:
+        Simulated time advances 10ms with each cooldown, and cooldowns last
+        between 30 seconds and 2 hours. One in ten cooldowns is global.
+    """
+    rng = random.Random(seed)
+    user_ids: list[str] = [
+        str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(users)
+    ]
+    interaction_ids: list[str] = [f"com.example.event{i}" for i in range(interactions)]
+
+    # Popular interactions are used far more often than the rest.
+    weights: list[float] = [1 / (rank + 1) for rank in range(interactions)]
+    stream: list[tuple[str, str | None, int]] = [
+        (
+            interaction,
+            None if rng.random() < 0.1 else rng.choice(user_ids),
+            rng.randint(30_000, 7_200_000),
+        )
+        for interaction in rng.choices(interaction_ids, weights, k=operations)
+    ]
+    started_on: int = 1_700_000_000_000
+
+    table = CooldownTable(str(uuid.UUID(int=rng.getrandbits(128))))
+    table_start, table_expire = _replay_table(
+        table, stream, started_on, expire_interval
+    )
+    document: dict = {"id": table.session_id, "cooldowns": {}}
+    document_start, document_expire = _replay_document(
+        document, stream, started_on, expire_interval
+    )
+
+    timings: list[float] = []
+
+    for serialize in (table.serialize, lambda: _serialize_document(document)):
+        begin: float = time.perf_counter()
+        serialize()
+        timings.append(time.perf_counter() - begin)
+
+    now: int = started_on + operations * 10
+
+    for interaction, user, duration in stream[:10]:
+        table.start(interaction, now + duration, user)
+        _start_document(document, interaction, now + duration, user)
+
+    begin = time.perf_counter()
+    serialized: str = table.serialize()
+    timings.append(time.perf_counter() - begin)
+    begin = time.perf_counter()
+    _serialize_document(document)
+    timings.append(time.perf_counter() - begin)
+
+    memory: tuple[int, int, int] | None = None
+
+    if measure_memory:
+        sizes: list[int] = []
+
+        for replay, container, serialize_replayed in (
+            (
+                _replay_table,
+                lambda: CooldownTable(table.session_id, cache_serialized=False),
+                CooldownTable.serialize,
+            ),
+            (
+                _replay_table,
+                lambda: CooldownTable(table.session_id),
+                CooldownTable.serialize,
+            ),
+            (
+                _replay_document,
+                lambda: {"id": table.session_id, "cooldowns": {}},
+                _serialize_document,
+            ),
+        ):
+            tracemalloc.start()
+            baseline: int = tracemalloc.get_traced_memory()[0]
+            replayed = container()
+            replay(replayed, stream, started_on, expire_interval)
+            # The serialized document itself is discarded, but any cache the
+            # container keeps to serialize faster next time is counted.
+            serialize_replayed(replayed)
+            sizes.append(tracemalloc.get_traced_memory()[0] - baseline)
+            tracemalloc.stop()
+            del replayed
+
+        memory = (sizes[0], sizes[1], sizes[2])
+
+    return CooldownBenchmark(
+        operations=operations,
+        live=len(table),
+        start_seconds=(table_start, document_start),
+        expire_seconds=(table_expire, document_expire),
+        full_serialize_seconds=(timings[0], timings[1]),
+        incremental_serialize_seconds=(timings[2], timings[3]),
+        memory=memory,
+        document_size=len(serialized.encode("utf-8")),
+    )
+
+
+def _replay_table(
+    table: CooldownTable,
+    stream: list[tuple[str, str | None, int]],
+    started_on: int,
+    expire_interval: int,
+) -> tuple[float, float]:
+    start_seconds: float = 0.0
+    expire_seconds: float = 0.0
+
+    for offset in range(0, len(stream), expire_interval):
+        now: int = started_on + offset * 10
+        begin: float = time.perf_counter()
+
+        for step, (interaction, user, duration) in enumerate(
+            stream[offset : offset + expire_interval]
+        ):
+            table.start(interaction, now + step * 10 + duration, user)
+
+        start_seconds += time.perf_counter() - begin
+        begin = time.perf_counter()
+        table.expire(now + expire_interval * 10)
+        expire_seconds += time.perf_counter() - begin
+
+    return start_seconds, expire_seconds
+
+
+def _replay_document(
+    document: dict,
+    stream: list[tuple[str, str | None, int]],
+    started_on: int,
+    expire_interval: int,
+) -> tuple[float, float]:
+    start_seconds: float = 0.0
+    expire_seconds: float = 0.0
+
+    for offset in range(0, len(stream), expire_interval):
+        now: int = started_on + offset * 10
+        begin: float = time.perf_counter()
+
+        for step, (interaction, user, duration) in enumerate(
+            stream[offset : offset + expire_interval]
+        ):
+            _start_document(document, interaction, now + step * 10 + duration, user)
+
+        start_seconds += time.perf_counter() - begin
+        begin = time.perf_counter()
+        _expire_document(document, now + expire_interval * 10)
+        expire_seconds += time.perf_counter() - begin
+
+    return start_seconds, expire_seconds
+
+
+def _start_document(
+    document: dict, interaction: str, expires_on: int, user: str | None
+):
+    cooldown: dict = document["cooldowns"].setdefault(
+        interaction, {"global_expires_on": None, "user_expires_on": {}}
+    )
+
+    if user is None:
+        cooldown["global_expires_on"] = expires_on
+    else:
+        cooldown["user_expires_on"][user] = expires_on
+
+
+def _expire_document(document: dict, now: int):
+    for interaction, cooldown in list(document["cooldowns"].items()):
+        if cooldown["global_expires_on"] is not None:
+            if cooldown["global_expires_on"] <= now:
+                cooldown["global_expires_on"] = None
+
+        user_expires_on: dict[str, int] = cooldown["user_expires_on"]
+
+        for user in [
+            u for u, expires_on in user_expires_on.items() if expires_on <= now
+        ]:
+            del user_expires_on[user]
+
+        if cooldown["global_expires_on"] is None and not user_expires_on:
+            del document["cooldowns"][interaction]
+
+
+def _serialize_document(document: dict) -> str:
+    return json.dumps(
+        {
+            "id": document["id"],
+            "cooldowns": {
+                interaction: {
+                    "global_expires_on": (
+                        None
+                        if cooldown["global_expires_on"] is None
+                        else format_timestamp(cooldown["global_expires_on"])
+                    ),
+                    "user_expires_on": {
+                        user: format_timestamp(expires_on)
+                        for user, expires_on in cooldown["user_expires_on"].items()
+                    },
+                }
+                for interaction, cooldown in document["cooldowns"].items()
+            },
+        }
+    )
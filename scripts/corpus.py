@@ -4,6 +4,8 @@ from enum import StrEnum
 from pathlib import Path
 from xml.etree import cElementTree as ET
 
+from cache import cached_on_files
+
 
 class ResourceType(StrEnum):
     """Represents the types of resources that the build script supports."""
@@ -33,6 +35,7 @@ class Corpus:
     bundles: list[ResourceBundle]
 
 
+@cached_on_files(lambda path: [path])
 def load_corpus(path: Path) -> Corpus:
     with path.open("r", encoding="utf-8") as file:
         xml = ET.ElementTree(file=file)
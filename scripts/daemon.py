@@ -0,0 +1,261 @@
+"""
+Contains the build daemon, a long-running process that executes CLI commands on
+behalf of other processes, and the thin client that forwards commands to it.
+
+The daemon listens on a Unix socket under the ".run" directory, or a named pipe
+on Windows. Connections are authenticated with a key the daemon writes to the
+".run" directory when it starts, so only processes that can read the worktree
+can issue commands to it.
+
+Notes:
+    This module is imported before anything else when the CLI starts, so it
+    must only depend on the standard library.
+"""
+
+import hashlib
+import io
+import os
+import sys
+import time
+import traceback
+from collections.abc import Callable
+from contextlib import redirect_stderr
+from contextlib import redirect_stdout
+from multiprocessing.connection import AuthenticationError
+from multiprocessing.connection import Client
+from multiprocessing.connection import Connection
+from multiprocessing.connection import Listener
+from pathlib import Path
+from typing import Final
+
+__all__ = ["FORWARDED_COMMANDS", "daemon_address", "forward", "serve", "stop"]
+
+DAEMON_KEY_PATH: Final[Path] = Path(".run", ".daemon.key")
+DISABLE_DAEMON_VARIABLE: Final[str] = "STREAMKIT_NO_DAEMON"
+FORWARDED_COMMANDS: Final[set[str]] = {"unnest", "condense", "deploy", "ensure-active"}
+
+
+def daemon_address() -> tuple[str, str]:
+    """Returns the address, and address family, the daemon for the current
+    working directory listens on.
+    """
+    if sys.platform == "win32":
+        key: str = os.getcwd().casefold()
+        name: str = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+        return f"\\\\.\\pipe\\streamkit-{name}", "AF_PIPE"
+
+    return str(Path(".run", ".daemon.sock")), "AF_UNIX"
+
+
+def forward(args: list[str]) -> int | None:
+    """Forwards a command to the daemon, and relays its output.
+
+    Args:
+        args:
+            The command line arguments of the command being forwarded.
+    Returns:
+        The command's exit code, or `None` if the command couldn't be
+        forwarded and should be executed in-process instead.
+    Notes:
+        Commands aren't forwarded if the "STREAMKIT_NO_DAEMON" environment
+        variable is set, if the daemon isn't running, or if the command runs
+        indefinitely, like `deploy --watch`.
+    """
+    if os.environ.get(DISABLE_DAEMON_VARIABLE):
+        return None
+
+    if not args or args[0] not in FORWARDED_COMMANDS or "--watch" in args:
+        return None
+
+    connection: Connection | None = _connect()
+
+    if connection is None:
+        return None
+
+    environment: dict[str, str] = {
+        key: value for key, value in os.environ.items() if key.startswith("STREAMKIT_")
+    }
+
+    with connection:
+        connection.send(("run", args, environment))
+
+        while True:
+            try:
+                kind, payload = connection.recv()
+            except EOFError:
+                print("The build daemon stopped unexpectedly", file=sys.stderr)
+
+                return 1
+
+            match kind:
+                case "stdout":
+                    sys.stdout.write(payload)
+                    sys.stdout.flush()
+                case "stderr":
+                    sys.stderr.write(payload)
+                    sys.stderr.flush()
+                case "exit":
+                    return payload
+
+
+def stop() -> bool:
+    """Asks the daemon for the current working directory to stop.
+
+    Returns:
+        Whether a daemon was running.
+    """
+    connection: Connection | None = _connect()
+
+    if connection is None:
+        return False
+
+    with connection:
+        connection.send(("stop",))
+
+        try:
+            connection.recv()
+        except EOFError:
+            pass
+
+    return True
+
+
+def serve(handler: Callable[[list[str]], int]):
+    """Serves forwarded commands until asked to stop.
+
+    Args:
+        handler:
+            The function that executes a command, given its command line
+            arguments, and returns its exit code. Anything the function writes
+            to stdout or stderr is relayed to the client.
+    Notes:
+        Commands are executed one at a time, in the order they're received, as
+        they all operate on the same worktree.
+    """
+    address, family = daemon_address()
+    key: bytes = os.urandom(32)
+
+    if family == "AF_UNIX":
+        Path(address).unlink(missing_ok=True)
+        Path(address).parent.mkdir(parents=True, exist_ok=True)
+
+    listener = Listener(address, family, authkey=key)
+
+    DAEMON_KEY_PATH.parent.mkdir(parents=True, exist_ok=True)
+    DAEMON_KEY_PATH.unlink(missing_ok=True)
+    descriptor: int = os.open(DAEMON_KEY_PATH, os.O_WRONLY | os.O_CREAT, 0o600)
+
+    with os.fdopen(descriptor, "wb") as f:
+        f.write(key)
+
+    try:
+        while True:
+            try:
+                connection: Connection = listener.accept()
+            except (AuthenticationError, OSError):
+                continue
+
+            with connection:
+                try:
+                    request: tuple = connection.recv()
+                except (EOFError, OSError):
+                    continue
+
+                match request:
+                    case ("stop",):
+                        connection.send(("exit", 0))
+
+                        break
+                    case ("run", args, environment):
+                        _run(connection, handler, args, environment)
+    finally:
+        listener.close()
+        DAEMON_KEY_PATH.unlink(missing_ok=True)
+
+
+class _ConnectionWriter(io.TextIOBase):
+    """A text stream that relays everything written to it to a client."""
+
+    def __init__(self, connection: Connection, kind: str):
+        self._connection: Connection = connection
+        self._kind: str = kind
+
+    @property
+    def encoding(self) -> str:
+        return "utf-8"
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        # Some libraries probe whether a stream is binary by writing bytes to
+        # it, and expect text streams to reject them.
+        if not isinstance(text, str):
+            raise TypeError(f"write() argument must be str, not {type(text).__name__}")
+
+        if text:
+            self._connection.send((self._kind, text))
+
+        return len(text)
+
+
+def _connect() -> Connection | None:
+    try:
+        key: bytes = DAEMON_KEY_PATH.read_bytes()
+    except OSError:
+        return None
+
+    address, family = daemon_address()
+
+    try:
+        return Client(address, family, authkey=key)
+    except (OSError, AuthenticationError, EOFError):
+        return None
+
+
+def _run(
+    connection: Connection,
+    handler: Callable[[list[str]], int],
+    args: list[str],
+    environment: dict[str, str],
+):
+    started: float = time.perf_counter()
+    previous: dict[str, str | None] = {
+        key: os.environ.get(key)
+        for key in environment.keys()
+        | {key for key in os.environ if key.startswith("STREAMKIT_")}
+    }
+
+    # The client's environment is applied for the duration of the command, as
+    # some options can be set through environment variables.
+    for key in previous:
+        if key in environment:
+            os.environ[key] = environment[key]
+        else:
+            os.environ.pop(key, None)
+
+    exit_code: int = 1
+
+    try:
+        with redirect_stdout(_ConnectionWriter(connection, "stdout")):
+            with redirect_stderr(_ConnectionWriter(connection, "stderr")):
+                try:
+                    exit_code = handler(args)
+                except (BrokenPipeError, ConnectionError, EOFError):
+                    raise
+                except Exception:
+                    traceback.print_exc()
+
+        connection.send(("exit", exit_code))
+    except (BrokenPipeError, ConnectionError, EOFError):
+        print("Client disconnected before the command finished", file=sys.stderr)
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    elapsed: float = (time.perf_counter() - started) * 1000
+    print(f"{' '.join(args)} exited with {exit_code} in {elapsed:.0f}ms")
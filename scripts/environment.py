@@ -2,6 +2,9 @@
 This file contains the `Environment` class, which indirectly indexes the file
 system for the Steam install directory. Once the directory is indexed for the
 first time, it's saved to disk for quicker access.
+
+The environment also records the mod directories the mod should be deployed
+to, which may span multiple game installs.
 """
 
 from dataclasses import dataclass
@@ -9,12 +12,14 @@ from dataclasses import field
 from pathlib import Path
 from typing import Self
 
+from cache import cached_on_files
 from probe import locate_steam_install
 
 
 @dataclass(slots=True)
 class Environment:
     steam_install_path: Path | None = field(default_factory=locate_steam_install)
+    target_mod_directories: list[Path] = field(default_factory=list)
 
     @property
     def game_install_path(self):
@@ -34,7 +39,20 @@ class Environment:
         """
         return self.steam_install_path.joinpath("workshop\\294100")
 
+    @property
+    def mod_directories(self) -> list[Path]:
+        """Returns the mod directories the mod should be deployed to.
+
+        If no target mod directories were configured, the mod is only deployed
+        to the "Mods" folder of the game's installation path.
+        """
+        if self.target_mod_directories:
+            return self.target_mod_directories
+
+        return [self.game_install_path.joinpath("Mods", "StreamKit")]
+
     @classmethod
+    @cached_on_files(lambda cls: [Path(".run\\.steam"), Path(".run", ".targets")])
     def create_instance(cls) -> Self:
         """Creates a new instance of the `Environment` class.
 
@@ -50,16 +68,22 @@ class Environment:
             the file system, roughly 3 directories deep, for the Steam
             executable. If it's found, the directory will be saved to said
             special file for subsequent calls.
+
+            The mod directories to deploy to can be listed, one per line, in a
+            special file called ".targets" under the ".run" directory. When
+            the file exists, the mod is deployed to each listed directory
+            instead of the game's own "Mods" folder.
         """
         steam_path_file: Path = Path(".run\\.steam")
+        target_mod_directories: list[Path] = _load_target_mod_directories()
 
         if steam_path_file.exists():
             with steam_path_file.open() as f:
                 path = Path(f.read())
 
-                return cls(path)
+                return cls(path, target_mod_directories)
 
-        instance: Self = cls()
+        instance: Self = cls(target_mod_directories=target_mod_directories)
 
         if instance.steam_install_path is None:
             raise ValueError("Steam installation path is not set")
@@ -69,3 +93,13 @@ class Environment:
                 f.write(str(instance.steam_install_path))
 
         return instance
+
+
+def _load_target_mod_directories() -> list[Path]:
+    targets_file: Path = Path(".run", ".targets")
+
+    if not targets_file.exists():
+        return []
+
+    with targets_file.open() as f:
+        return [Path(line.strip()) for line in f if line.strip()]
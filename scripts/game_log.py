@@ -0,0 +1,287 @@
+"""
+Contains a streaming parser for the log the game writes to stdout when it's
+launched with "-logFile -". The parser groups multi-line stack traces into
+single entries, and indexes the errors that originate from the assemblies or
+namespaces being filtered for, while only ever holding a bounded amount of the
+log in memory.
+"""
+
+import json
+import os
+import re
+from collections import deque
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from typing import Final
+
+__all__ = ["LogEntry", "ErrorSummary", "LogParser", "compile_filters"]
+
+MAX_ENTRY_LINES: Final[int] = 256
+
+# Matches the frames of both .NET ("  at Namespace.Type.Method () ...") and
+# Unity ("Namespace.Type:Method (args)") stack traces, as well as the lines
+# Unity and the runtime use to annotate them.
+_FRAME_PATTERN: Final[re.Pattern[str]] = re.compile(
+    r"^(?:\s+at\s|[\w.`<>+\[\]]+:[\w.`<>\[\]|]+\s?\(.*\)\s*$|\(Filename:"
+    r"|\s*---\s|Rethrow as\s|\[Ref [0-9A-F]+\])"
+)
+_ERROR_PATTERN: Final[re.Pattern[str]] = re.compile(
+    r"\b(?:\w+Exception|Error|Exception|Failed|Could not)\b", re.IGNORECASE
+)
+
+
+def compile_filters(patterns: list[str]) -> re.Pattern[str]:
+    """Compiles a list of assembly or namespace patterns into a single regular
+    expression.
+
+    Args:
+        patterns:
+            The patterns to compile. An asterisk matches any number of
+            identifier characters, so "StreamKit.*" matches every namespace
+            under "StreamKit", like "StreamKit.Mod.Api".
+    """
+    parts: list[str] = [
+        re.escape(pattern).replace(r"\*", r"[\w.`<>]*") for pattern in patterns
+    ]
+
+    return re.compile(rf"(?<![\w.])(?:{'|'.join(parts)})")
+
+
+@dataclass(slots=True)
+class LogEntry:
+    """Represents a single message in the game's log, along with its stack
+    trace, if it had one.
+
+    Attributes:
+        line_number:
+            The line number of the entry's first line in the log.
+        offset:
+            The byte offset of the entry's first line in the log.
+        lines:
+            The entry's lines, with the message first.
+        truncated:
+            The number of lines that were dropped from the entry, as it was
+            longer than `MAX_ENTRY_LINES`.
+    """
+
+    line_number: int
+    offset: int
+    lines: list[str] = field(default_factory=list)
+    truncated: int = 0
+
+    @property
+    def message(self) -> str:
+        """Returns the entry's message."""
+        return self.lines[0] if self.lines else ""
+
+    @property
+    def has_stack_trace(self) -> bool:
+        """Returns whether the entry includes a stack trace."""
+        return len(self.lines) > 1 or self.truncated > 0
+
+
+@dataclass(slots=True)
+class ErrorSummary:
+    """Represents every occurrence of a distinct error in the game's log.
+
+    Attributes:
+        signature:
+            The error's message, followed by the first stack frame that matched
+            the filters, which identifies the error across occurrences.
+        count:
+            The number of times the error occurred.
+        first_line:
+            The line number of the error's first occurrence in the log.
+        first_offset:
+            The byte offset of the error's first occurrence in the log.
+        last_line:
+            The line number of the error's latest occurrence in the log.
+        last_offset:
+            The byte offset of the error's latest occurrence in the log.
+        lines:
+            The lines of the error's first occurrence.
+        context:
+            The lines of the log that preceded the error's first occurrence.
+    """
+
+    signature: str
+    count: int
+    first_line: int
+    first_offset: int
+    last_line: int
+    last_offset: int
+    lines: list[str]
+    context: list[str]
+
+
+class LogParser:
+    """A streaming parser for the game's log.
+
+    Attributes:
+        filters:
+            The expression that matches the assemblies and namespaces errors
+            are being indexed for.
+        errors:
+            The distinct errors that matched the filters, keyed by their
+            signature, in the order they first occurred.
+        line_count:
+            The number of lines parsed.
+        dropped_errors:
+            The number of distinct errors that weren't indexed, as the maximum
+            number of distinct errors was reached.
+    """
+
+    def __init__(
+        self,
+        filters: re.Pattern[str],
+        ring_size: int = 64,
+        context_size: int = 8,
+        max_errors: int = 1000,
+    ):
+        self.filters: re.Pattern[str] = filters
+        self.errors: dict[str, ErrorSummary] = {}
+        self.line_count: int = 0
+        self.dropped_errors: int = 0
+
+        self._ring: deque[tuple[int, str]] = deque(maxlen=ring_size)
+        self._context_size: int = context_size
+        self._max_errors: int = max_errors
+        self._offset: int = 0
+        self._entry: LogEntry | None = None
+
+    @property
+    def recent_lines(self) -> list[str]:
+        """Returns the most recent lines of the log, oldest first."""
+        return [line for _, line in self._ring]
+
+    def feed(self, raw_line: bytes) -> ErrorSummary | None:
+        """Parses a single line of the log.
+
+        Args:
+            raw_line:
+                The line, as read from the game's stdout, including its line
+                terminator.
+        Returns:
+            The summary of the error the line completed, if it completed the
+            first occurrence of an error that matched the filters.
+        """
+        offset: int = self._offset
+        self._offset += len(raw_line)
+        self.line_count += 1
+
+        line: str = raw_line.decode("utf-8", "replace").rstrip("\r\n")
+        entry: LogEntry | None = self._entry
+        completed: ErrorSummary | None = None
+
+        if not line.strip():
+            completed = self._complete()
+        elif entry is not None and _FRAME_PATTERN.match(line):
+            if len(entry.lines) < MAX_ENTRY_LINES:
+                entry.lines.append(line)
+            else:
+                entry.truncated += 1
+        else:
+            completed = self._complete()
+            self._entry = LogEntry(self.line_count, offset, [line])
+
+        self._ring.append((self.line_count, line))
+
+        return completed
+
+    def finish(self) -> ErrorSummary | None:
+        """Completes the entry that's currently being parsed, which is needed
+        once the log ends.
+        """
+        return self._complete()
+
+    def write_summary(self, path: Path, log_path: Path | None = None):
+        """Writes the indexed summary of the errors found so far.
+
+        Args:
+            path:
+                The path the summary is written to.
+            log_path:
+                The path to the full log the summary's offsets point into, if
+                it was saved.
+        """
+        summary = {
+            "log": None if log_path is None else str(log_path),
+            "lines": self.line_count,
+            "bytes": self._offset,
+            "dropped_errors": self.dropped_errors,
+            "errors": [asdict(error) for error in self.errors.values()],
+        }
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staging_path: Path = path.with_name(f"{path.name}.tmp")
+
+        with staging_path.open("w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+        os.replace(staging_path, path)
+
+    def _complete(self) -> ErrorSummary | None:
+        entry: LogEntry | None = self._entry
+
+        if entry is None:
+            return None
+
+        self._entry = None
+
+        # Most of the log is made up of informational messages, so the cheaper
+        # checks are done first.
+        if not entry.has_stack_trace and not _ERROR_PATTERN.search(entry.message):
+            return None
+
+        match: str | None = None
+
+        for line in entry.lines:
+            if self.filters.search(line):
+                match = line.strip()
+
+                break
+
+        if match is None:
+            return None
+
+        signature: str = entry.message
+
+        if match != entry.message:
+            signature = f"{entry.message}\n{match}"
+
+        error: ErrorSummary | None = self.errors.get(signature)
+
+        if error is not None:
+            error.count += 1
+            error.last_line = entry.line_number
+            error.last_offset = entry.offset
+
+            return None
+
+        if len(self.errors) >= self._max_errors:
+            self.dropped_errors += 1
+
+            return None
+
+        error = ErrorSummary(
+            signature=signature,
+            count=1,
+            first_line=entry.line_number,
+            first_offset=entry.offset,
+            last_line=entry.line_number,
+            last_offset=entry.offset,
+            lines=entry.lines,
+            context=self._context_for(entry),
+        )
+        self.errors[signature] = error
+
+        return error
+
+    def _context_for(self, entry: LogEntry) -> list[str]:
+        context: list[str] = [
+            line for number, line in self._ring if number < entry.line_number
+        ]
+
+        return context[-self._context_size :]
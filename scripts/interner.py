@@ -0,0 +1,208 @@
+"""
+Contains tables of interned strings, which map each distinct string to a small
+integer, so structures holding many references to the same strings can store
+integers instead.
+"""
+
+import json
+from array import array
+from collections.abc import Iterator
+from typing import Final
+
+__all__ = ["Interner", "CompactInterner"]
+
+_EMPTY: Final[int] = -1
+_MIN_CAPACITY: Final[int] = 8
+
+
+class Interner:
+    """A table of interned strings.
+
+    Strings are assigned consecutive indexes, starting from zero, in the order
+    they're first interned. Strings are never removed from the table, so an
+    index remains valid for the table's lifetime.
+    """
+
+    def __init__(self, values: list[str] | None = None):
+        self._values: list[str] = []
+        self._indexes: dict[str, int] = {}
+
+        for value in values or []:
+            self.intern(value)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __getitem__(self, index: int) -> str:
+        return self._values[index]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def intern(self, value: str) -> int:
+        """Returns the index of the given string, interning it if it wasn't
+        already.
+        """
+        index: int | None = self._indexes.get(value)
+
+        if index is None:
+            index = len(self._values)
+            self._indexes[value] = index
+            self._values.append(value)
+
+        return index
+
+    def get(self, value: str) -> int | None:
+        """Returns the index of the given string, or `None` if it was never
+        interned.
+        """
+        return self._indexes.get(value)
+
+    def encoded(self, index: int) -> str:
+        """Returns the string at the given index, encoded as a JSON string."""
+        return json.dumps(self._values[index])
+
+
+class CompactInterner:
+    """A table of interned strings, for tables holding so many strings that the
+    per-string overhead of an `Interner` matters, and whose strings come and
+    go.
+
+    Strings are assigned consecutive indexes, starting from zero, in the order
+    they're first interned. An index remains valid until its string is
+    released, after which it may be assigned to the next string interned.
+
+    Notes:
+        Strings are found through an open-addressing hash table of indexes,
+        backed by an array, so each string costs a few bytes on top of the
+        reference to it, instead of a dictionary entry and a boxed integer.
+        In exchange, strings are looked up in Python rather than C, which is
+        several times slower. The hash table shrinks as strings are released,
+        while the indexes they were assigned are kept for reuse.
+    """
+
+    def __init__(self, values: list[str] | None = None):
+        self._values: list[str | None] = []
+        self._slots: array = array("i", [_EMPTY]) * _MIN_CAPACITY
+        self._free: array = array("i")
+        self._size: int = 0
+
+        for value in values or []:
+            self.intern(value)
+
+    def __len__(self) -> int:
+        """Returns the number of indexes assigned, including released ones."""
+        return len(self._values)
+
+    def __getitem__(self, index: int) -> str:
+        return self._values[index]
+
+    def __iter__(self) -> Iterator[str | None]:
+        """Iterates over the strings in index order, with `None` in place of
+        the strings that were released.
+        """
+        return iter(self._values)
+
+    def intern(self, value: str) -> int:
+        """Returns the index of the given string, interning it if it wasn't
+        already.
+        """
+        slots: array = self._slots
+        values: list[str | None] = self._values
+        mask: int = len(slots) - 1
+        position: int = hash(value) & mask
+
+        while (index := slots[position]) != _EMPTY:
+            if values[index] == value:
+                return index
+
+            position = position + 1 & mask
+
+        if (self._size + 1) * 4 > len(slots) * 3:
+            self._resize(len(slots) * 2)
+
+            return self.intern(value)
+
+        if self._free:
+            index = self._free.pop()
+            values[index] = value
+        else:
+            index = len(values)
+            values.append(value)
+
+        slots[position] = index
+        self._size += 1
+
+        return index
+
+    def get(self, value: str) -> int | None:
+        """Returns the index of the given string, or `None` if it isn't
+        interned.
+        """
+        index: int = self._slots[self._find(value)]
+
+        return None if index == _EMPTY else index
+
+    def release(self, index: int):
+        """Removes the string at the given index from the table, so its index
+        can be assigned to another string.
+        """
+        slots: array = self._slots
+        values: list[str | None] = self._values
+        mask: int = len(slots) - 1
+        hole: int = self._find(values[index])
+        current: int = hole
+
+        # Entries after the removed one are shifted back into the hole, unless
+        # that would move them before their home position, so lookups never
+        # need to skip over deleted entries.
+        while True:
+            current = current + 1 & mask
+            moved: int = slots[current]
+
+            if moved == _EMPTY:
+                break
+
+            home: int = hash(values[moved]) & mask
+
+            if (current - home & mask) >= (current - hole & mask):
+                slots[hole] = moved
+                hole = current
+
+        slots[hole] = _EMPTY
+        values[index] = None
+        self._free.append(index)
+        self._size -= 1
+
+        if self._size * 8 < len(slots) and len(slots) > _MIN_CAPACITY:
+            self._resize(len(slots) // 2)
+
+    def encoded(self, index: int) -> str:
+        """Returns the string at the given index, encoded as a JSON string."""
+        return json.dumps(self._values[index])
+
+    def _find(self, value: str) -> int:
+        slots: array = self._slots
+        values: list[str | None] = self._values
+        mask: int = len(slots) - 1
+        position: int = hash(value) & mask
+
+        while (index := slots[position]) != _EMPTY and values[index] != value:
+            position = position + 1 & mask
+
+        return position
+
+    def _resize(self, capacity: int):
+        self._slots = slots = array("i", [_EMPTY]) * capacity
+        mask: int = capacity - 1
+
+        for index, value in enumerate(self._values):
+            if value is None:
+                continue
+
+            position: int = hash(value) & mask
+
+            while slots[position] != _EMPTY:
+                position = position + 1 & mask
+
+            slots[position] = index
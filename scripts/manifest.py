@@ -0,0 +1,424 @@
+"""
+Contains methods for taking a snapshot of the files that get deployed to a mod
+directory, and synchronizing any number of mod directories with the differences
+between their last deployed snapshot and the current one.
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from stat import S_ISDIR
+from typing import Final
+
+from store import ArtifactStore
+from watch import Watcher
+
+__all__ = [
+    "DEPLOYED_FILES",
+    "DEPLOYED_DIRECTORIES",
+    "Manifest",
+    "SyncResult",
+    "snapshot_sources",
+    "track_sources",
+    "load_manifest",
+    "save_manifest",
+    "sync_targets",
+]
+
+DEPLOYED_FILES: Final[list[Path]] = [
+    Path("Corpus.xml"),
+    Path("LoadFolders.xml"),
+    Path("README.md"),
+    Path("LICENSE"),
+]
+DEPLOYED_DIRECTORIES: Final[list[Path]] = [
+    Path("About"),
+    Path("Releases"),
+    Path("Common"),
+]
+MANIFESTS_PATH: Final[Path] = Path(".run", ".manifests")
+
+_MAX_PENDING_FILES: Final[int] = 8
+
+Manifest = dict[Path, tuple[int, int]]
+"""Maps the relative path of a deployed file to its size and modification time."""
+
+
+@dataclass(slots=True)
+class SyncResult:
+    """Represents the changes made to a mod directory while synchronizing it.
+
+    Attributes:
+        copied:
+            The relative paths of the files that were copied to the mod
+            directory.
+        removed:
+            The relative paths of the files that were removed from the mod
+            directory.
+        failed:
+            The relative paths of the files that couldn't be copied to the mod
+            directory, mapped to the reason why.
+        manifest:
+            The snapshot of the files that are now deployed to the mod
+            directory.
+        elapsed:
+            The number of seconds it took for the mod directory to be
+            synchronized.
+    """
+
+    copied: list[Path] = field(default_factory=list)
+    removed: list[Path] = field(default_factory=list)
+    failed: dict[Path, str] = field(default_factory=dict)
+    manifest: Manifest = field(default_factory=dict)
+    elapsed: float = 0.0
+
+
+def snapshot_sources() -> Manifest:
+    """Takes a snapshot of every file that gets deployed to the mod directory.
+
+    Notes:
+        If the deployed files are being tracked, the snapshot is derived from
+        the previous one and the changes reported since, instead of scanning
+        every deployed directory again.
+    """
+    if _tracker is not None:
+        return _tracker.snapshot()
+
+    return _scan_sources()
+
+
+def track_sources(watcher: Watcher):
+    """Keeps the snapshot of the deployed files warm between calls to
+    `snapshot_sources`, updating it from the changes reported by the given
+    watcher.
+
+    Args:
+        watcher:
+            A watcher over `DEPLOYED_DIRECTORIES` and `DEPLOYED_FILES`. It
+            should be notified of changes, rather than scan for them, or
+            keeping the snapshot warm is slower than taking it from scratch.
+    """
+    global _tracker
+
+    _tracker = _SourceTracker(watcher)
+
+
+@dataclass(slots=True)
+class _SourceTracker:
+    watcher: Watcher
+    manifest: Manifest | None = None
+
+    def snapshot(self) -> Manifest:
+        changes: set[Path] = self._drain()
+
+        if self.watcher.overflowed:
+            self.watcher.overflowed = False
+            self.manifest = None
+
+        if self.manifest is None:
+            self.manifest = _scan_sources()
+        else:
+            for path in changes:
+                self._update(path)
+
+        return dict(self.manifest)
+
+    def _drain(self) -> set[Path]:
+        changes: set[Path] = set()
+
+        while more := self.watcher.wait(0):
+            changes.update(more)
+
+        return changes
+
+    def _update(self, path: Path):
+        try:
+            stat = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            self.manifest.pop(path, None)
+
+            for key in [key for key in self.manifest if key.is_relative_to(path)]:
+                del self.manifest[key]
+
+            return
+
+        if S_ISDIR(stat.st_mode):
+            _scan_directory(path, self.manifest)
+        else:
+            self.manifest[path] = (stat.st_size, stat.st_mtime_ns)
+
+
+_tracker: _SourceTracker | None = None
+
+
+def _scan_sources() -> Manifest:
+    manifest: Manifest = {}
+
+    for file in DEPLOYED_FILES:
+        try:
+            stat = os.stat(file)
+        except FileNotFoundError:
+            continue
+
+        manifest[file] = (stat.st_size, stat.st_mtime_ns)
+
+    for directory in DEPLOYED_DIRECTORIES:
+        _scan_directory(directory, manifest)
+
+    return manifest
+
+
+def _scan_directory(directory: Path, manifest: Manifest):
+    pending: list[str] = [str(directory)]
+
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+
+        with entries:
+            for entry in entries:
+                if entry.is_dir():
+                    pending.append(entry.path)
+
+                    continue
+
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+
+                manifest[Path(entry.path)] = (stat.st_size, stat.st_mtime_ns)
+
+
+def load_manifest(mod_directory: Path) -> Manifest:
+    """Loads the snapshot of the files that were last deployed to the given mod
+    directory, which is empty if the directory was never deployed to.
+
+    Args:
+        mod_directory:
+            The mod directory whose manifest is being loaded.
+    """
+    manifest_path: Path = _manifest_path(mod_directory)
+
+    if not manifest_path.exists():
+        return {}
+
+    try:
+        with manifest_path.open("r", encoding="utf-8") as f:
+            contents = json.load(f)
+    except (ValueError, OSError):
+        return {}
+
+    return {Path(path): tuple(signature) for path, signature in contents.items()}
+
+
+def save_manifest(mod_directory: Path, manifest: Manifest):
+    """Saves the snapshot of the files that are deployed to the given mod
+    directory.
+
+    Args:
+        mod_directory:
+            The mod directory whose manifest is being saved.
+        manifest:
+            The snapshot of the files that are deployed to the mod directory.
+    """
+    manifest_path: Path = _manifest_path(mod_directory)
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    staging_path: Path = manifest_path.with_suffix(".tmp")
+
+    with staging_path.open("w", encoding="utf-8") as f:
+        json.dump({path.as_posix(): list(sig) for path, sig in manifest.items()}, f)
+
+    os.replace(staging_path, manifest_path)
+
+
+def sync_targets(
+    previous: dict[Path, Manifest],
+    current: Manifest,
+    store: ArtifactStore | None = None,
+) -> dict[Path, SyncResult]:
+    """Copies the files that changed since each mod directory was last
+    synchronized, and removes the files that no longer exist.
+
+    Args:
+        previous:
+            The mod directories being synchronized, mapped to the snapshot of
+            the files that were last deployed to them.
+        current:
+            The snapshot of the files that should now be deployed.
+        store:
+            The artifact store files should be materialized from, or `None` if
+            files should be copied.
+    Notes:
+        Every source file is read once, regardless of how many mod directories
+        it's being deployed to. Each mod directory is written to from its own
+        thread, so a slow target doesn't hold up the others.
+
+        The manifests aren't trusted blindly; a file is also copied if it's
+        missing from the mod directory, or its size differs from the one
+        recorded, as the mod directory may have been changed by something
+        else since it was last synchronized.
+
+        Files are only materialized from the artifact store into mod
+        directories they can be reflinked to. Mod directories on another
+        volume, or on a file system without reflinks, like NTFS or ext4, are
+        copied to directly, as materializing files there would copy them into
+        the store, then out of it again. Files are never hardlinked into a mod
+        directory, as other tools may write to them in place.
+    """
+    results: dict[Path, SyncResult] = {
+        target: SyncResult(manifest=dict(manifest))
+        for target, manifest in previous.items()
+    }
+    pending: dict[Path, list[Path]] = {}
+    stored: set[Path] = set()
+
+    if store is not None:
+        stored = {target for target in previous if store.can_reflink_to(target)}
+
+    for target, manifest in previous.items():
+        for path, signature in current.items():
+            deployed: tuple[int, int] | None = manifest.get(path)
+
+            if deployed != signature or not _is_deployed(
+                target.joinpath(path), deployed
+            ):
+                pending.setdefault(path, []).append(target)
+
+    started: float = time.perf_counter()
+    workers: dict[Path, ThreadPoolExecutor] = {
+        target: ThreadPoolExecutor(1, thread_name_prefix="deploy")
+        for target in previous
+    }
+    in_flight: deque[list[tuple[Path, Path, Future]]] = deque()
+
+    try:
+        for path, targets in pending.items():
+            # Bounds the number of source files held in memory at once.
+            while len(in_flight) >= _MAX_PENDING_FILES:
+                _collect(in_flight.popleft(), results, current, started)
+
+            contents: bytes | None = None
+
+            try:
+                if stored.intersection(targets):
+                    store.put(path)
+
+                if not stored.issuperset(targets):
+                    contents = path.read_bytes()
+            except OSError as e:
+                for target in targets:
+                    results[target].failed[path] = str(e)
+
+                continue
+
+            in_flight.append(
+                [
+                    (
+                        target,
+                        path,
+                        workers[target].submit(
+                            _write_file,
+                            path,
+                            target.joinpath(path),
+                            contents,
+                            current[path],
+                            store if target in stored else None,
+                        ),
+                    )
+                    for target in targets
+                ]
+            )
+
+        while in_flight:
+            _collect(in_flight.popleft(), results, current, started)
+
+        for target, manifest in previous.items():
+            result: SyncResult = results[target]
+            start: float = time.perf_counter()
+
+            for path in manifest.keys() - current.keys():
+                try:
+                    target.joinpath(path).unlink(missing_ok=True)
+                except OSError as e:
+                    result.failed[path] = str(e)
+
+                    continue
+
+                result.manifest.pop(path, None)
+                result.removed.append(path)
+
+            result.elapsed += time.perf_counter() - start
+    finally:
+        for worker in workers.values():
+            worker.shutdown()
+
+    return results
+
+
+def _collect(
+    batch: list[tuple[Path, Path, Future]],
+    results: dict[Path, SyncResult],
+    current: Manifest,
+    started: float,
+):
+    for target, path, future in batch:
+        result: SyncResult = results[target]
+
+        try:
+            finished: float = future.result()
+        except OSError as e:
+            result.failed[path] = str(e)
+            result.manifest.pop(path, None)
+
+            continue
+
+        result.copied.append(path)
+        result.manifest[path] = current[path]
+        result.elapsed = max(result.elapsed, finished - started)
+
+
+def _write_file(
+    source: Path,
+    destination: Path,
+    contents: bytes | None,
+    signature: tuple[int, int],
+    store: ArtifactStore | None,
+) -> float:
+    destination.parent.mkdir(parents=True, exist_ok=True)
+
+    if store is not None:
+        store.materialize(source, destination, hardlink=False)
+
+        return time.perf_counter()
+
+    # The destination is unlinked first, as it may be hardlinked to a blob in
+    # the artifact store from a previous deployment.
+    destination.unlink(missing_ok=True)
+    destination.write_bytes(contents)
+    os.utime(destination, ns=(time.time_ns(), signature[1]))
+
+    return time.perf_counter()
+
+
+def _is_deployed(destination: Path, signature: tuple[int, int]) -> bool:
+    try:
+        return os.stat(destination).st_size == signature[0]
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+
+
+def _manifest_path(mod_directory: Path) -> Path:
+    key: str = str(mod_directory.resolve()).casefold()
+    name: str = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+    return MANIFESTS_PATH.joinpath(f"{name}.json")
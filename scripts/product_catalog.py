@@ -0,0 +1,752 @@
+"""
+Contains a compact encoding for the per-user product lists modelled by
+"schemas/user-products.json5", along with methods for converting between it and
+the documented shape.
+
+The documented shape stores every product a user has available, even though
+most users have the same products, at the same cost and karma, as everyone
+else. The compact encoding instead stores a shared, versioned base catalog
+once, and each user as the handful of differences between their products and
+the catalog's.
+
+A packed file is laid out as follows, with every integer being a variable
+length integer unless noted otherwise:
+
+    header: the magic bytes "SKUP", and the format version as a single byte
+    records: each user's differences from the catalog, back to back
+    trailer:
+        strings: every interned product id and karma type
+        catalogs: each catalog's version, and its products
+        index: each user's id, and the offset and length of their record
+    footer: the trailer's offset as an unsigned 64-bit little-endian integer,
+        and the magic bytes again
+
+The trailer is written last, so users can be packed as they're read, and read
+first, so a single user can be decoded without decoding anyone else.
+"""
+
+import io
+import json
+import mmap
+import random
+import struct
+import time
+import uuid
+from collections import Counter
+from collections.abc import Iterable
+from collections.abc import Iterator
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from typing import BinaryIO
+from typing import Final
+
+from interner import Interner
+
+__all__ = [
+    "Product",
+    "Catalog",
+    "ProductStoreWriter",
+    "ProductStore",
+    "ProductBenchmark",
+    "run_benchmark",
+]
+
+MAGIC: Final[bytes] = b"SKUP"
+FORMAT_VERSION: Final[int] = 1
+
+_FOOTER: Final[struct.Struct] = struct.Struct("<Q4s")
+_HEADER_SIZE: Final[int] = len(MAGIC) + 1
+
+_SPARSE_RECORD: Final[int] = 0
+_VERBATIM_RECORD: Final[int] = 1
+
+_UUID_USER_ID: Final[int] = 0
+
+_DOCUMENT_KEYS: Final[set[str]] = {"id", "products"}
+_PRODUCT_KEYS: Final[set[str]] = {"id", "cost", "karma"}
+
+
+@dataclass(frozen=True, slots=True)
+class Product:
+    """Represents a product available to a user.
+
+    Attributes:
+        id:
+            The unique id of the product.
+        cost:
+            The cost of the product, in points.
+        karma:
+            The karma type of the product.
+    """
+
+    id: str
+    cost: int
+    karma: str
+
+    def to_document(self) -> dict:
+        """Returns the product in the documented shape."""
+        return {"id": self.id, "cost": self.cost, "karma": self.karma}
+
+
+@dataclass(slots=True)
+class Catalog:
+    """Represents the products every user has available by default.
+
+    Attributes:
+        version:
+            The version of the catalog, which users are encoded against.
+        products:
+            The products in the catalog, in the order they're listed to users.
+    """
+
+    version: int
+    products: list[Product] = field(default_factory=list)
+
+    def to_document(self) -> dict:
+        """Returns the catalog, with its products in the documented shape."""
+        return {
+            "version": self.version,
+            "products": [product.to_document() for product in self.products],
+        }
+
+    @classmethod
+    def from_document(cls, document: dict) -> "Catalog":
+        """Loads a catalog saved with `to_document`.
+
+        Args:
+            document:
+                The catalog, as decoded from JSON.
+        """
+        return cls(
+            document["version"],
+            [Product(p["id"], p["cost"], p["karma"]) for p in document["products"]],
+        )
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[dict], version: int = 1) -> "Catalog":
+        """Derives a catalog from the most common product list among the given
+        users.
+
+        Args:
+            documents:
+                The users' products, in the documented shape.
+            version:
+                The version assigned to the catalog.
+        """
+        counts: Counter[tuple[Product, ...]] = Counter()
+
+        for document in documents:
+            products: list[Product] | None = _parse_products(document)
+
+            if products is not None:
+                counts[tuple(products)] += 1
+
+        if not counts:
+            return cls(version)
+
+        return cls(version, list(counts.most_common(1)[0][0]))
+
+
+class ProductStoreWriter:
+    """Packs users' products into the compact encoding.
+
+    Notes:
+        Users whose documents don't fit the documented shape, like products
+        with extra properties or costs that aren't integers, are stored as
+        JSON, so converting back to the documented shape is always lossless.
+    """
+
+    def __init__(self, stream: BinaryIO, catalog: Catalog):
+        self._stream: BinaryIO = stream
+        self._catalog: Catalog = catalog
+        self._catalog_documents: list[dict] = [
+            product.to_document() for product in catalog.products
+        ]
+        self._catalog_indexes: dict[str, int] = {
+            product.id: index for index, product in enumerate(catalog.products)
+        }
+        self._strings: Interner = Interner()
+        self._index: dict[str, tuple[int, int]] = {}
+        self._offset: int = _HEADER_SIZE
+
+        # Records made up of no differences are by far the most common, so
+        # they're encoded once up front.
+        self._unchanged_record: bytes = bytes(self._encode_sparse([], [], [], None))
+
+        for product in catalog.products:
+            self._strings.intern(product.id)
+            self._strings.intern(product.karma)
+
+        self._stream.write(MAGIC + bytes([FORMAT_VERSION]))
+
+    def __enter__(self) -> "ProductStoreWriter":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def add(self, document: dict):
+        """Packs a user's products.
+
+        Args:
+            document:
+                The user's products, in the documented shape.
+        Raises:
+            ValueError:
+                A user with the same id was already packed.
+        """
+        user_id: str = str(document.get("id")) if isinstance(document, dict) else ""
+
+        if user_id in self._index:
+            raise ValueError(f"User {user_id} was already packed")
+
+        record: bytes | bytearray
+
+        if (
+            isinstance(document, dict)
+            and document.keys() == _DOCUMENT_KEYS
+            and document["products"] == self._catalog_documents
+            and isinstance(document["id"], str)
+            # Floats and booleans compare equal to integers, but wouldn't
+            # survive the round trip.
+            and all(type(p["cost"]) is int for p in document["products"])
+        ):
+            record = self._unchanged_record
+        else:
+            record = self._encode(document)
+
+        self._stream.write(record)
+        self._index[user_id] = (self._offset, len(record))
+        self._offset += len(record)
+
+    def close(self):
+        """Writes the trailer, which completes the packed file."""
+        trailer = bytearray()
+
+        _write_varint(trailer, len(self._strings))
+
+        for value in self._strings:
+            _write_string(trailer, value)
+
+        _write_varint(trailer, 1)
+        _write_varint(trailer, self._catalog.version)
+        _write_varint(trailer, len(self._catalog.products))
+
+        for product in self._catalog.products:
+            _write_varint(trailer, self._strings.intern(product.id))
+            _write_varint(trailer, _zigzag(product.cost))
+            _write_varint(trailer, self._strings.intern(product.karma))
+
+        _write_varint(trailer, len(self._index))
+        previous_offset: int = _HEADER_SIZE
+
+        for user_id, (offset, length) in self._index.items():
+            _write_user_id(trailer, user_id)
+            _write_varint(trailer, offset - previous_offset)
+            _write_varint(trailer, length)
+            previous_offset = offset
+
+        self._stream.write(trailer)
+        self._stream.write(_FOOTER.pack(self._offset, MAGIC))
+
+    def _encode(self, document: dict) -> bytes:
+        products: list[Product] | None = _parse_products(document)
+
+        if products is None or not isinstance(document["id"], str):
+            record = bytearray([_VERBATIM_RECORD])
+            record.extend(json.dumps(document).encode("utf-8"))
+
+            return bytes(record)
+
+        catalog: list[Product] = self._catalog.products
+        present: set[int] = set()
+        overrides: list[tuple[int, Product]] = []
+        additions: list[Product] = []
+        references: list[int] = []
+
+        for product in products:
+            index: int | None = self._catalog_indexes.get(product.id)
+
+            if index is None:
+                references.append(len(catalog) + len(additions))
+                additions.append(product)
+
+                continue
+
+            present.add(index)
+            references.append(index)
+
+            if catalog[index] != product:
+                overrides.append((index, product))
+
+        removed: list[int] = [i for i in range(len(catalog)) if i not in present]
+        canonical: list[int] = [i for i in range(len(catalog)) if i in present]
+        canonical.extend(range(len(catalog), len(catalog) + len(additions)))
+
+        return bytes(
+            self._encode_sparse(
+                removed,
+                sorted(overrides, key=lambda o: o[0]),
+                additions,
+                None if references == canonical else references,
+            )
+        )
+
+    def _encode_sparse(
+        self,
+        removed: list[int],
+        overrides: list[tuple[int, Product]],
+        additions: list[Product],
+        order: list[int] | None,
+    ) -> bytearray:
+        record = bytearray([_SPARSE_RECORD])
+        _write_varint(record, self._catalog.version)
+
+        _write_varint(record, len(removed))
+        previous: int = 0
+
+        for index in removed:
+            _write_varint(record, index - previous)
+            previous = index
+
+        _write_varint(record, len(overrides))
+        previous = 0
+
+        for index, product in overrides:
+            _write_varint(record, index - previous)
+            _write_varint(record, _zigzag(product.cost))
+            _write_varint(record, self._strings.intern(product.karma))
+            previous = index
+
+        _write_varint(record, len(additions))
+
+        for product in additions:
+            _write_varint(record, self._strings.intern(product.id))
+            _write_varint(record, _zigzag(product.cost))
+            _write_varint(record, self._strings.intern(product.karma))
+
+        # The order is only stored when it differs from the catalog's, with
+        # the products the user added listed last.
+        if order is None:
+            _write_varint(record, 0)
+        else:
+            _write_varint(record, len(order) + 1)
+
+            for reference in order:
+                _write_varint(record, reference)
+
+        return record
+
+
+class ProductStore:
+    """Reads users' products from the compact encoding.
+
+    Notes:
+        Opening a packed file only reads its trailer. Each user's record is
+        decoded when, and every time, it's requested.
+    """
+
+    def __init__(self, data: bytes | mmap.mmap):
+        if len(data) < _HEADER_SIZE + _FOOTER.size or data[: len(MAGIC)] != MAGIC:
+            raise ValueError("The data isn't a packed product store")
+
+        if data[len(MAGIC)] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported product store format {data[len(MAGIC)]}")
+
+        trailer_offset, magic = _FOOTER.unpack_from(data, len(data) - _FOOTER.size)
+
+        if magic != MAGIC:
+            raise ValueError("The product store is truncated")
+
+        self._data: bytes | mmap.mmap = data
+        self._strings: list[str] = []
+        self.catalogs: dict[int, Catalog] = {}
+        self._index: dict[str, tuple[int, int]] = {}
+
+        position: int = trailer_offset
+        count, position = _read_varint(data, position)
+
+        for _ in range(count):
+            value, position = _read_string(data, position)
+            self._strings.append(value)
+
+        count, position = _read_varint(data, position)
+
+        for _ in range(count):
+            version, position = _read_varint(data, position)
+            product_count, position = _read_varint(data, position)
+            products: list[Product] = []
+
+            for _ in range(product_count):
+                product, position = self._read_product(position)
+                products.append(product)
+
+            self.catalogs[version] = Catalog(version, products)
+
+        count, position = _read_varint(data, position)
+        offset: int = _HEADER_SIZE
+
+        for _ in range(count):
+            user_id, position = _read_user_id(data, position)
+            delta, position = _read_varint(data, position)
+            length, position = _read_varint(data, position)
+            offset += delta
+            self._index[user_id] = (offset, length)
+
+    @classmethod
+    def open(cls, path: Path) -> "ProductStore":
+        """Opens a packed file, mapping it into memory rather than reading it.
+
+        Args:
+            path:
+                The path to the packed file.
+        """
+        with path.open("rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def get(self, user_id: str) -> dict | None:
+        """Decodes a single user's products into the documented shape, or
+        returns `None` if the user wasn't packed.
+
+        Args:
+            user_id:
+                The id of the user.
+        """
+        location: tuple[int, int] | None = self._index.get(user_id)
+
+        if location is None:
+            return None
+
+        offset, length = location
+        data = self._data
+
+        if data[offset] == _VERBATIM_RECORD:
+            return json.loads(bytes(data[offset + 1 : offset + length]))
+
+        version, position = _read_varint(data, offset + 1)
+        catalog: list[Product] = self.catalogs[version].products
+        products: list[Product | None] = list(catalog)
+
+        count, position = _read_varint(data, position)
+        index: int = 0
+
+        for _ in range(count):
+            delta, position = _read_varint(data, position)
+            index += delta
+            products[index] = None
+
+        count, position = _read_varint(data, position)
+        index = 0
+
+        for _ in range(count):
+            delta, position = _read_varint(data, position)
+            cost, position = _read_varint(data, position)
+            karma, position = _read_varint(data, position)
+            index += delta
+            products[index] = Product(
+                catalog[index].id, _unzigzag(cost), self._strings[karma]
+            )
+
+        count, position = _read_varint(data, position)
+
+        for _ in range(count):
+            product, position = self._read_product(position)
+            products.append(product)
+
+        count, position = _read_varint(data, position)
+
+        if count:
+            ordered: list[Product | None] = []
+
+            for _ in range(count - 1):
+                reference, position = _read_varint(data, position)
+                ordered.append(products[reference])
+
+            products = ordered
+
+        return {
+            "id": user_id,
+            "products": [p.to_document() for p in products if p is not None],
+        }
+
+    def documents(self) -> Iterator[dict]:
+        """Decodes every user's products into the documented shape, in the
+        order they were packed.
+        """
+        for user_id in self._index:
+            yield self.get(user_id)
+
+    def _read_product(self, position: int) -> tuple[Product, int]:
+        product_id, position = _read_varint(self._data, position)
+        cost, position = _read_varint(self._data, position)
+        karma, position = _read_varint(self._data, position)
+
+        return (
+            Product(self._strings[product_id], _unzigzag(cost), self._strings[karma]),
+            position,
+        )
+
+
+def _parse_products(document: dict) -> list[Product] | None:
+    if not isinstance(document, dict) or document.keys() != _DOCUMENT_KEYS:
+        return None
+
+    if not isinstance(document["products"], list):
+        return None
+
+    products: list[Product] = []
+    seen: set[str] = set()
+
+    for product in document["products"]:
+        if not isinstance(product, dict) or product.keys() != _PRODUCT_KEYS:
+            return None
+
+        product_id, cost, karma = product["id"], product["cost"], product["karma"]
+
+        if not isinstance(product_id, str) or not isinstance(karma, str):
+            return None
+
+        if type(cost) is not int or product_id in seen:
+            return None
+
+        seen.add(product_id)
+        products.append(Product(product_id, cost, karma))
+
+    return products
+
+
+def _zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+
+def _write_varint(out: bytearray, value: int):
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+
+    out.append(value)
+
+
+def _read_varint(data: bytes | mmap.mmap, position: int) -> tuple[int, int]:
+    result: int = 0
+    shift: int = 0
+
+    while True:
+        byte: int = data[position]
+        position += 1
+        result |= (byte & 0x7F) << shift
+
+        if byte < 0x80:
+            return result, position
+
+        shift += 7
+
+
+def _write_string(out: bytearray, value: str):
+    encoded: bytes = value.encode("utf-8")
+    _write_varint(out, len(encoded))
+    out.extend(encoded)
+
+
+def _read_string(data: bytes | mmap.mmap, position: int) -> tuple[str, int]:
+    length, position = _read_varint(data, position)
+
+    return bytes(data[position : position + length]).decode("utf-8"), position + length
+
+
+def _write_user_id(out: bytearray, user_id: str):
+    # Most user ids are UUIDs, which are stored as their 16 raw bytes, as long
+    # as they'd be formatted back to the exact same string.
+    try:
+        parsed: uuid.UUID | None = uuid.UUID(user_id)
+    except ValueError:
+        parsed = None
+
+    if parsed is not None and str(parsed) == user_id:
+        _write_varint(out, _UUID_USER_ID)
+        out.extend(parsed.bytes)
+
+        return
+
+    encoded: bytes = user_id.encode("utf-8")
+    _write_varint(out, len(encoded) + 1)
+    out.extend(encoded)
+
+
+def _read_user_id(data: bytes | mmap.mmap, position: int) -> tuple[str, int]:
+    tag, position = _read_varint(data, position)
+
+    if tag == _UUID_USER_ID:
+        return (
+            str(uuid.UUID(bytes=bytes(data[position : position + 16]))),
+            position + 16,
+        )
+
+    end: int = position + tag - 1
+
+    return bytes(data[position:end]).decode("utf-8"), end
+
+
+@dataclass(slots=True)
+class ProductBenchmark:
+    """Represents the outcome of benchmarking the compact encoding against the
+    documented shape, with one JSON document per user.
+
+    Attributes:
+        users:
+            The number of users encoded.
+        catalog_size:
+            The number of products in the catalog.
+        size:
+            The number of bytes the users took, for the compact encoding and
+            the documented shape respectively.
+        encode_seconds:
+            The number of seconds it took to encode every user, for the compact
+            encoding and the documented shape respectively.
+        open_seconds:
+            The number of seconds it took to open the packed file.
+        lookup_seconds:
+            The average number of seconds it took to decode a single user, for
+            the compact encoding and the documented shape respectively.
+    """
+
+    users: int
+    catalog_size: int
+    size: tuple[int, int]
+    encode_seconds: tuple[float, float]
+    open_seconds: float
+    lookup_seconds: tuple[float, float]
+
+
+def run_benchmark(
+    users: int = 100_000,
+    catalog_size: int = 150,
+    lookups: int = 2_000,
+    seed: int = 0,
+) -> ProductBenchmark:
+    """Encodes a synthetic viewer base with both the compact encoding and the
+    documented shape, and decodes a sample of users from each.
+
+    Args:
+        users:
+            The number of users to generate.
+        catalog_size:
+            The number of products in the catalog.
+        lookups:
+            The number of users decoded individually.
+        seed:
+            The seed for the synthetic viewer base.
+    Notes:
+        Most users have the catalog's products unchanged. One in ten changes
+        the cost or karma of a few products, one in twenty-five also removes
+        some products and adds a few of their own, and one in a hundred lists
+        their products in a different order.
+    """
+    rng = random.Random(seed)
+    karma: list[str] = ["good", "neutral", "bad", "doom"]
+    catalog = Catalog(
+        1,
+        [
+            Product(f"Thing{i}", rng.randrange(10, 5000, 10), rng.choice(karma))
+            for i in range(catalog_size)
+        ],
+    )
+
+    stream = io.BytesIO()
+    sampled: set[int] = set(rng.sample(range(users), min(lookups, users)))
+    samples: dict[str, bytes] = {}
+    sizes: list[int] = [0, 0]
+    encode_seconds: list[float] = [0.0, 0.0]
+
+    with ProductStoreWriter(stream, catalog) as writer:
+        for start in range(0, users, 1000):
+            batch: list[dict] = [
+                _synthetic_user(rng, catalog, karma)
+                for _ in range(start, min(start + 1000, users))
+            ]
+
+            begin: float = time.perf_counter()
+
+            for document in batch:
+                writer.add(document)
+
+            encode_seconds[0] += time.perf_counter() - begin
+            begin = time.perf_counter()
+            encoded: list[bytes] = [json.dumps(d).encode("utf-8") for d in batch]
+            encode_seconds[1] += time.perf_counter() - begin
+            sizes[1] += sum(len(e) for e in encoded)
+
+            for offset, document in enumerate(batch):
+                if start + offset in sampled:
+                    samples[document["id"]] = encoded[offset]
+
+    sizes[0] = stream.tell()
+
+    begin = time.perf_counter()
+    store = ProductStore(stream.getvalue())
+    open_seconds: float = time.perf_counter() - begin
+
+    for user_id, encoded in samples.items():
+        if store.get(user_id) != json.loads(encoded):
+            raise AssertionError(f"User {user_id} didn't survive the round trip")
+
+    lookup_seconds: list[float] = []
+
+    for decode in (store.get, lambda user_id: json.loads(samples[user_id])):
+        begin = time.perf_counter()
+
+        for user_id in samples:
+            decode(user_id)
+
+        lookup_seconds.append((time.perf_counter() - begin) / max(1, len(samples)))
+
+    return ProductBenchmark(
+        users=users,
+        catalog_size=catalog_size,
+        size=(sizes[0], sizes[1]),
+        encode_seconds=(encode_seconds[0], encode_seconds[1]),
+        open_seconds=open_seconds,
+        lookup_seconds=(lookup_seconds[0], lookup_seconds[1]),
+    )
+
+
+def _synthetic_user(rng: random.Random, catalog: Catalog, karma: list[str]) -> dict:
+    products: list[dict] = [product.to_document() for product in catalog.products]
+    roll: float = rng.random()
+
+    if roll < 0.1:
+        for product in rng.sample(products, 3):
+            product["cost"] = rng.randrange(10, 5000, 10)
+            product["karma"] = rng.choice(karma)
+
+    if roll < 0.04:
+        for product in rng.sample(products, 5):
+            products.remove(product)
+
+        products.extend(
+            {
+                "id": f"Custom{rng.randrange(1000)}.{i}",
+                "cost": rng.randrange(10, 5000, 10),
+                "karma": rng.choice(karma),
+            }
+            for i in range(3)
+        )
+
+    if roll < 0.01:
+        rng.shuffle(products)
+
+    return {"id": str(uuid.UUID(int=rng.getrandbits(128))), "products": products}
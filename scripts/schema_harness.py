@@ -0,0 +1,1164 @@
+"""
+Contains a synthetic load harness for the SQL schemas in the "schemas"
+directory. The harness loads the schemas into a database, bulk-generates
+synthetic users, sessions, and interactions, runs the queries the mod is
+expected to make against them, and reports on their latency, their query plans,
+and the indexes the schemas are missing.
+
+The schemas are written for Postgres. When a Postgres database isn't available,
+they're loaded into SQLite instead, with the types SQLite doesn't support
+translated to their nearest equivalent.
+
+Notes:
+    Loading the schemas into Postgres requires the "psycopg" package, which
+    isn't a dependency of the build scripts and must be installed separately.
+"""
+
+import random
+import re
+import statistics
+import time
+import uuid
+from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Iterator
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from typing import Final
+
+__all__ = [
+    "Column",
+    "Table",
+    "Schema",
+    "SchemaIssue",
+    "QueryResult",
+    "HarnessReport",
+    "SqliteBackend",
+    "PostgresBackend",
+    "load_schema",
+    "find_schema_issues",
+    "format_report",
+    "run_harness",
+]
+
+SCHEMAS_PATH: Final[Path] = Path("schemas")
+
+_COMMENT_PATTERN: Final[re.Pattern[str]] = re.compile(r"/\*.*?\*/|--[^\n]*", re.S)
+_ENUM_PATTERN: Final[re.Pattern[str]] = re.compile(
+    r"CREATE\s+TYPE\s+(\w+)\s+AS\s+ENUM\s*\((.*)\)", re.I | re.S
+)
+_TABLE_PATTERN: Final[re.Pattern[str]] = re.compile(
+    r"CREATE\s+TABLE\s+(\w+)\s*\((.*)\)", re.I | re.S
+)
+_INDEX_PATTERN: Final[re.Pattern[str]] = re.compile(
+    r"CREATE\s+(UNIQUE\s+)?INDEX\s+(\w+)\s+ON\s+(\w+)\s*\((.*)\)", re.I | re.S
+)
+_REFERENCES_PATTERN: Final[re.Pattern[str]] = re.compile(
+    r"REFERENCES\s+(\w+)\s*\(\s*(\w+)\s*\)", re.I
+)
+_DEFAULT_PATTERN: Final[re.Pattern[str]] = re.compile(r"DEFAULT\s+(\S+)", re.I)
+
+_CONTENT_SOURCE_COUNT: Final[int] = 250
+_PRODUCTS_PER_CONTENT_SOURCE: Final[int] = 40
+_INTERACTION_NAMES: Final[list[str]] = [
+    "Equip",
+    "Wear",
+    "Ingest",
+    "Install",
+    "Haul",
+    "Prioritize",
+    "Rescue",
+    "Arrest",
+    "Tame",
+    "Hunt",
+]
+_GAME_VERSIONS: Final[list[str]] = ["1.4.3901", "1.5.4104", "1.5.4297"]
+_PRODUCT_TYPES: Final[list[str]] = [
+    "item",
+    "trait",
+    "pawn",
+    "childhood",
+    "adulthood",
+    "event",
+]
+
+# Namespaces for the synthetic ids, so ids of different entities never collide.
+_USER_NAMESPACE: Final[int] = 1
+_SESSION_NAMESPACE: Final[int] = 2
+
+
+@dataclass(slots=True)
+class Column:
+    """Represents a column of a table.
+
+    Attributes:
+        name:
+            The name of the column.
+        type:
+            The column's declared type, in upper case.
+        primary_key:
+            Whether the column is the table's primary key.
+        unique:
+            Whether the column's values must be unique.
+        not_null:
+            Whether the column's values must not be null.
+        default:
+            The column's default value, as declared.
+        references:
+            The table and column the column references, if it's a foreign key.
+    """
+
+    name: str
+    type: str
+    primary_key: bool = False
+    unique: bool = False
+    not_null: bool = False
+    default: str | None = None
+    references: tuple[str, str] | None = None
+
+
+@dataclass(slots=True)
+class Table:
+    """Represents a table declared in the schemas.
+
+    Attributes:
+        name:
+            The name of the table.
+        columns:
+            The table's columns, in the order they were declared.
+        primary_key:
+            The columns that make up the table's primary key.
+    """
+
+    name: str
+    columns: list[Column] = field(default_factory=list)
+    primary_key: list[str] = field(default_factory=list)
+
+    def column(self, name: str) -> Column | None:
+        """Returns the column with the given name, if the table has one."""
+        for column in self.columns:
+            if column.name.casefold() == name.casefold():
+                return column
+
+        return None
+
+
+@dataclass(slots=True)
+class Index:
+    """Represents an index declared in the schemas.
+
+    Attributes:
+        name:
+            The name of the index.
+        table:
+            The name of the table the index is on.
+        columns:
+            The indexed columns, in order.
+        unique:
+            Whether the index is a unique index.
+    """
+
+    name: str
+    table: str
+    columns: list[str]
+    unique: bool = False
+
+
+@dataclass(slots=True)
+class Schema:
+    """Represents every type, table, and index declared in the schemas.
+
+    Attributes:
+        enums:
+            The enum types, mapped to their values.
+        tables:
+            The tables, in an order where every table comes after the tables
+            it references.
+        indexes:
+            The indexes.
+    """
+
+    enums: dict[str, list[str]] = field(default_factory=dict)
+    tables: list[Table] = field(default_factory=list)
+    indexes: list[Index] = field(default_factory=list)
+
+    def table(self, name: str) -> Table | None:
+        """Returns the table with the given name, if there is one."""
+        for table in self.tables:
+            if table.name.casefold() == name.casefold():
+                return table
+
+        return None
+
+    def is_indexed(self, table: str, column: str) -> bool:
+        """Returns whether lookups on the given column can use an index, which
+        is the case when it's the leading column of the table's primary key,
+        a unique constraint, or an index.
+        """
+        table_obj: Table | None = self.table(table)
+
+        if table_obj is None:
+            return False
+
+        leading: list[str] = []
+
+        if table_obj.primary_key:
+            leading.append(table_obj.primary_key[0])
+
+        leading.extend(c.name for c in table_obj.columns if c.unique)
+        leading.extend(
+            i.columns[0]
+            for i in self.indexes
+            if i.table.casefold() == table.casefold() and i.columns
+        )
+
+        return any(name.casefold() == column.casefold() for name in leading)
+
+
+@dataclass(slots=True)
+class SchemaIssue:
+    """Represents a problem found in the schemas.
+
+    Attributes:
+        table:
+            The table the problem was found in.
+        column:
+            The column the problem was found in.
+        description:
+            A human-readable description of the problem.
+        suggestion:
+            The statement that would fix the problem, if there is one.
+    """
+
+    table: str
+    column: str
+    description: str
+    suggestion: str | None = None
+
+
+@dataclass(slots=True)
+class Query:
+    """Represents a query in the expected query mix.
+
+    Attributes:
+        name:
+            The name of the query.
+        sql:
+            The query, with "%s" placeholders for its parameters.
+        parameters:
+            A function that returns a random set of parameters for the query.
+        predicates:
+            The table and column pairs the query filters on.
+    """
+
+    name: str
+    sql: str
+    parameters: Callable[[random.Random], tuple]
+    predicates: list[tuple[str, str]]
+
+
+@dataclass(slots=True)
+class QueryResult:
+    """Represents the outcome of running a query repeatedly.
+
+    Attributes:
+        name:
+            The name of the query.
+        latencies:
+            The latency, in milliseconds, of each execution of the query.
+        plan:
+            The query plan the database chose for the query.
+        full_scans:
+            The tables the query plan scans in full.
+    """
+
+    name: str
+    latencies: list[float]
+    plan: list[str]
+    full_scans: list[str]
+
+    @property
+    def p50(self) -> float:
+        """Returns the median latency, in milliseconds."""
+        return statistics.median(self.latencies)
+
+    @property
+    def p95(self) -> float:
+        """Returns the 95th percentile latency, in milliseconds."""
+        if len(self.latencies) < 2:
+            return self.latencies[0]
+
+        return statistics.quantiles(self.latencies, n=20)[-1]
+
+
+@dataclass(slots=True)
+class HarnessReport:
+    """Represents the outcome of a harness run.
+
+    Attributes:
+        backend:
+            The name of the database the harness ran against.
+        row_counts:
+            The tables, mapped to the number of rows loaded into them.
+        load_seconds:
+            The tables, mapped to the number of seconds it took to load them.
+        issues:
+            The problems found in the schemas.
+        results:
+            The outcome of each query in the query mix.
+        advised_results:
+            The outcome of each query in the query mix after the suggested
+            indexes were created, if they were.
+    """
+
+    backend: str
+    row_counts: dict[str, int] = field(default_factory=dict)
+    load_seconds: dict[str, float] = field(default_factory=dict)
+    issues: list[SchemaIssue] = field(default_factory=list)
+    results: list[QueryResult] = field(default_factory=list)
+    advised_results: list[QueryResult] = field(default_factory=list)
+
+    @property
+    def suggested_indexes(self) -> list[str]:
+        """Returns the statements that create the suggested indexes."""
+        suggestions: list[str] = []
+
+        for issue in self.issues:
+            if issue.suggestion and issue.suggestion not in suggestions:
+                if issue.suggestion.startswith("CREATE INDEX"):
+                    suggestions.append(issue.suggestion)
+
+        return suggestions
+
+
+def load_schema(schemas_path: Path = SCHEMAS_PATH) -> Schema:
+    """Parses every SQL file in the schemas directory.
+
+    Args:
+        schemas_path:
+            The path to the directory containing the SQL files.
+    Raises:
+        ValueError:
+            A table references a table that isn't declared in any of the files.
+    """
+    schema = Schema()
+    tables: dict[str, Table] = {}
+
+    for path in sorted(schemas_path.glob("*.sql")):
+        text: str = _COMMENT_PATTERN.sub("", path.read_text(encoding="utf-8"))
+
+        for statement in text.split(";"):
+            statement = statement.strip()
+
+            if match := _ENUM_PATTERN.match(statement):
+                schema.enums[match[1].casefold()] = [
+                    value.strip().strip("'") for value in match[2].split(",")
+                ]
+            elif match := _TABLE_PATTERN.match(statement):
+                table: Table = _parse_table(match[1], match[2])
+                tables[table.name.casefold()] = table
+            elif match := _INDEX_PATTERN.match(statement):
+                schema.indexes.append(
+                    Index(
+                        name=match[2],
+                        table=match[3],
+                        columns=[c.strip() for c in match[4].split(",")],
+                        unique=match[1] is not None,
+                    )
+                )
+
+    # Tables are ordered so that referenced tables are created, and loaded,
+    # before the tables that reference them.
+    visiting: set[str] = set()
+
+    def visit(key: str):
+        if key in visiting or tables[key] in schema.tables:
+            return
+
+        visiting.add(key)
+
+        for column in tables[key].columns:
+            if column.references is None:
+                continue
+
+            referenced: str = column.references[0].casefold()
+
+            if referenced not in tables:
+                raise ValueError(
+                    f"{tables[key].name}.{column.name} references undeclared"
+                    f" table {column.references[0]}"
+                )
+
+            visit(referenced)
+
+        schema.tables.append(tables[key])
+
+    for key in tables:
+        visit(key)
+
+    return schema
+
+
+def find_schema_issues(schema: Schema) -> list[SchemaIssue]:
+    """Finds foreign keys whose type differs from the column they reference,
+    and foreign keys that can't be looked up through an index.
+
+    Args:
+        schema:
+            The schema being checked.
+    """
+    issues: list[SchemaIssue] = []
+
+    for table in schema.tables:
+        for column in table.columns:
+            if column.references is None:
+                continue
+
+            referenced_table: Table | None = schema.table(column.references[0])
+            referenced: Column | None = (
+                None
+                if referenced_table is None
+                else referenced_table.column(column.references[1])
+            )
+
+            if referenced is not None:
+                column_type: str = _canonical_type(column.type)
+                referenced_type: str = _canonical_type(referenced.type)
+
+                if column_type != referenced_type:
+                    issues.append(
+                        SchemaIssue(
+                            table.name,
+                            column.name,
+                            f"is declared as {column.type}, but references"
+                            f" {referenced_table.name}.{referenced.name}, which is"
+                            f" declared as {referenced.type}",
+                            f"ALTER TABLE {table.name} ALTER COLUMN {column.name}"
+                            f" TYPE {referenced.type};",
+                        )
+                    )
+
+            if not schema.is_indexed(table.name, column.name):
+                issues.append(
+                    SchemaIssue(
+                        table.name,
+                        column.name,
+                        "is a foreign key without an index, so lookups and"
+                        " cascading deletes scan the whole table",
+                        _index_statement(table.name, column.name),
+                    )
+                )
+
+    return issues
+
+
+class SqliteBackend:
+    """Loads the schemas into a SQLite database.
+
+    The types SQLite doesn't support are translated: enums become text columns
+    constrained to the enum's values, UUIDs become text, booleans become
+    integers, and serial keys become integer keys.
+    """
+
+    name: str = "sqlite"
+    placeholder: str = "?"
+
+    def __init__(self, database: Path | str = ":memory:"):
+        import sqlite3
+
+        if database != ":memory:":
+            Path(database).unlink(missing_ok=True)
+
+        self.connection = sqlite3.connect(database, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode = OFF")
+        self.connection.execute("PRAGMA synchronous = OFF")
+        self.connection.execute("PRAGMA foreign_keys = OFF")
+
+    def create_schema(self, schema: Schema):
+        for table in schema.tables:
+            definitions: list[str] = []
+
+            for column in table.columns:
+                definitions.append(self._column_definition(schema, table, column))
+
+            if len(table.primary_key) > 1:
+                definitions.append(f"PRIMARY KEY ({', '.join(table.primary_key)})")
+
+            self.execute(f"CREATE TABLE {table.name} ({', '.join(definitions)})")
+
+        for index in schema.indexes:
+            self.execute(_index_statement(index.table, *index.columns, name=index.name))
+
+    def insert(self, table: str, columns: list[str], rows: Iterable[tuple]) -> int:
+        statement: str = (
+            f"INSERT INTO {table} ({', '.join(columns)})"
+            f" VALUES ({', '.join('?' for _ in columns)})"
+        )
+        count: int = 0
+
+        self.connection.execute("BEGIN")
+
+        for batch in _batched(rows, 10_000):
+            self.connection.executemany(statement, batch)
+            count += len(batch)
+
+        self.connection.execute("COMMIT")
+
+        return count
+
+    def analyze(self):
+        self.execute("ANALYZE")
+
+    def execute(self, statement: str, parameters: tuple = ()) -> list[tuple]:
+        return self.connection.execute(statement, parameters).fetchall()
+
+    def explain(self, statement: str, parameters: tuple) -> tuple[list[str], list[str]]:
+        rows = self.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        plan: list[str] = [row[-1] for row in rows]
+        full_scans: list[str] = []
+
+        for detail in plan:
+            # Automatic indexes are built by SQLite on the fly, for every
+            # execution of the query, when no suitable index exists.
+            if match := re.match(r"(?:SCAN|SEARCH) (\w+)(?: AS \w+)?(.*)", detail):
+                if detail.startswith("SCAN") or "AUTOMATIC" in match[2]:
+                    full_scans.append(match[1])
+
+        return plan, full_scans
+
+    def close(self):
+        self.connection.close()
+
+    def _column_definition(self, schema: Schema, table: Table, column: Column) -> str:
+        column_type: str = column.type.casefold()
+        definition: str
+
+        if column_type in schema.enums:
+            values: str = ", ".join(f"'{v}'" for v in schema.enums[column_type])
+            definition = f"{column.name} TEXT CHECK ({column.name} IN ({values}))"
+        elif column_type == "serial":
+            definition = f"{column.name} INTEGER"
+        else:
+            definition = f"{column.name} {_SQLITE_TYPES.get(column_type, 'TEXT')}"
+
+        if column.primary_key:
+            definition += " PRIMARY KEY"
+
+        if column.unique:
+            definition += " UNIQUE"
+
+        if column.not_null:
+            definition += " NOT NULL"
+
+        if column.default is not None:
+            default: str = {"false": "0", "true": "1"}.get(
+                column.default.casefold(), column.default
+            )
+            definition += f" DEFAULT {default}"
+
+        if column.references is not None:
+            definition += f" REFERENCES {column.references[0]} ({column.references[1]})"
+
+        return definition
+
+
+class PostgresBackend:
+    """Loads the schemas into a dedicated schema of a Postgres database.
+
+    Foreign keys whose type differs from the column they reference are created
+    with the referenced column's type, as Postgres refuses to create them
+    otherwise. The difference is still reported as an issue.
+    """
+
+    name: str = "postgres"
+    placeholder: str = "%s"
+
+    def __init__(self, dsn: str, schema_name: str = "streamkit_harness"):
+        try:
+            import psycopg
+        except ImportError as e:
+            raise ImportError(
+                "The psycopg package is required to run the harness against Postgres"
+            ) from e
+
+        self.connection = psycopg.connect(dsn, autocommit=True)
+        self.execute(f"DROP SCHEMA IF EXISTS {schema_name} CASCADE")
+        self.execute(f"CREATE SCHEMA {schema_name}")
+        self.execute(f"SET search_path TO {schema_name}")
+
+    def create_schema(self, schema: Schema):
+        for name, values in schema.enums.items():
+            quoted: str = ", ".join(f"'{v}'" for v in values)
+            self.execute(f"CREATE TYPE {name} AS ENUM ({quoted})")
+
+        for table in schema.tables:
+            definitions: list[str] = []
+
+            for column in table.columns:
+                column_type: str = column.type
+
+                if column.references is not None:
+                    referenced_table = schema.table(column.references[0])
+                    referenced = referenced_table.column(column.references[1])
+
+                    if referenced is not None and _canonical_type(
+                        referenced.type
+                    ) != _canonical_type(column.type):
+                        column_type = _canonical_type(referenced.type)
+
+                definition: str = f"{column.name} {column_type}"
+
+                if column.primary_key:
+                    definition += " PRIMARY KEY"
+
+                if column.unique:
+                    definition += " UNIQUE"
+
+                if column.not_null:
+                    definition += " NOT NULL"
+
+                if column.default is not None:
+                    definition += f" DEFAULT {column.default}"
+
+                if column.references is not None:
+                    definition += (
+                        f" REFERENCES {column.references[0]} ({column.references[1]})"
+                    )
+
+                definitions.append(definition)
+
+            if len(table.primary_key) > 1:
+                definitions.append(f"PRIMARY KEY ({', '.join(table.primary_key)})")
+
+            self.execute(f"CREATE TABLE {table.name} ({', '.join(definitions)})")
+
+        for index in schema.indexes:
+            self.execute(_index_statement(index.table, *index.columns, name=index.name))
+
+    def insert(self, table: str, columns: list[str], rows: Iterable[tuple]) -> int:
+        count: int = 0
+
+        with self.connection.cursor() as cursor:
+            with cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row(row)
+                    count += 1
+
+        return count
+
+    def analyze(self):
+        self.execute("ANALYZE")
+
+    def execute(self, statement: str, parameters: tuple = ()) -> list[tuple]:
+        with self.connection.cursor() as cursor:
+            cursor.execute(statement, parameters or None)
+
+            return cursor.fetchall() if cursor.description else []
+
+    def explain(self, statement: str, parameters: tuple) -> tuple[list[str], list[str]]:
+        rows = self.execute(f"EXPLAIN {statement}", parameters)
+        plan: list[str] = [row[0] for row in rows]
+        full_scans: list[str] = []
+
+        for line in plan:
+            if match := re.search(r"Seq Scan on (\w+)", line):
+                full_scans.append(match[1])
+
+        return plan, full_scans
+
+    def close(self):
+        self.connection.close()
+
+
+def run_harness(
+    backend: SqliteBackend | PostgresBackend,
+    users: int,
+    sessions: int,
+    interactions: int,
+    viewers_per_session: int = 50,
+    iterations: int = 200,
+    apply_advice: bool = False,
+    seed: int = 0,
+    schemas_path: Path = SCHEMAS_PATH,
+    log: Callable[[str], object] = print,
+) -> HarnessReport:
+    """Loads the schemas into the given database, fills them with synthetic
+    data, and runs the expected query mix against them.
+
+    Args:
+        backend:
+            The database the harness runs against.
+        users:
+            The number of users to generate.
+        sessions:
+            The number of sessions to generate.
+        interactions:
+            The number of interactions to generate.
+        viewers_per_session:
+            The average number of users taking part in each session.
+        iterations:
+            The number of times each query in the query mix is executed.
+        apply_advice:
+            Whether the suggested indexes should be created, and the query mix
+            run again, to measure their effect.
+        seed:
+            The seed for the synthetic data and query parameters.
+        schemas_path:
+            The path to the directory containing the SQL files.
+        log:
+            The function progress messages are written to.
+    """
+    schema: Schema = load_schema(schemas_path)
+    report = HarnessReport(backend.name)
+    report.issues = find_schema_issues(schema)
+
+    log(f"Creating {len(schema.tables)} tables in {backend.name}...")
+    backend.create_schema(schema)
+
+    rng = random.Random(seed)
+    content_sources: list[str] = _content_source_ids()
+
+    loads: list[tuple[str, list[str], Iterator[tuple]]] = [
+        (
+            "ContentSources",
+            ["content_source_id", "content_source_type", "content_source_name"],
+            _generate_content_sources(content_sources),
+        ),
+        ("Users", ["user_id", "twitch_id"], _generate_users(users)),
+        (
+            "Sessions",
+            [
+                "session_id",
+                "game_version",
+                "user_id",
+                "infinite_points",
+                "poll_duration",
+                "minimum_order_amount",
+                "pawn_pooling",
+            ],
+            _generate_sessions(rng, sessions, users),
+        ),
+        (
+            "UserSessions",
+            ["session_id", "user_id"],
+            _generate_user_sessions(rng, sessions, users, viewers_per_session),
+        ),
+        (
+            "SessionContentSources",
+            ["session_id", "content_source_id"],
+            _generate_session_content_sources(rng, sessions, content_sources),
+        ),
+        (
+            "Interactions",
+            [
+                "interaction_id",
+                "session_id",
+                "content_source_id",
+                "interaction_name",
+            ],
+            _generate_interactions(rng, interactions, sessions, content_sources),
+        ),
+        (
+            "Products",
+            ["content_source_id", "product_id", "product_type", "product_category"],
+            _generate_products(rng, content_sources),
+        ),
+    ]
+
+    for table, columns, rows in loads:
+        started: float = time.perf_counter()
+        report.row_counts[table] = backend.insert(table, columns, rows)
+        report.load_seconds[table] = time.perf_counter() - started
+
+        log(
+            f"  Loaded {report.row_counts[table]} rows into {table} in"
+            f" {report.load_seconds[table]:.2f}s"
+        )
+
+    backend.analyze()
+
+    queries: list[Query] = _query_mix(users, sessions, content_sources)
+    log(f"Running {len(queries)} queries {iterations} times each...")
+    report.results = _run_queries(backend, queries, rng, iterations)
+
+    for result, query in zip(report.results, queries):
+        for table, column in query.predicates:
+            if not any(t.casefold() == table.casefold() for t in result.full_scans):
+                continue
+
+            if schema.is_indexed(table, column):
+                continue
+
+            issue = SchemaIssue(
+                table,
+                column,
+                f"is filtered on by the {query.name} query, whose plan scans the"
+                f" whole table",
+                _index_statement(table, column),
+            )
+
+            if not any(i.suggestion == issue.suggestion for i in report.issues):
+                report.issues.append(issue)
+
+    if apply_advice and report.suggested_indexes:
+        log(f"Creating {len(report.suggested_indexes)} suggested indexes...")
+
+        for statement in report.suggested_indexes:
+            backend.execute(statement.rstrip(";"))
+
+        backend.analyze()
+        report.advised_results = _run_queries(backend, queries, rng, iterations)
+
+    return report
+
+
+def format_report(report: HarnessReport) -> list[str]:
+    """Formats a harness report as human-readable lines, including the query
+    plan of each query, before and after the suggested indexes were created.
+
+    Args:
+        report:
+            The report being formatted.
+    """
+    lines: list[str] = [f"Backend: {report.backend}", "", "Rows loaded:"]
+
+    for table, count in report.row_counts.items():
+        seconds: float = report.load_seconds[table]
+        rate: float = count / seconds if seconds else 0.0
+        lines.append(f"  {table:<24}{count:>12,} rows  {rate:>12,.0f} rows/s")
+
+    advised: dict[str, QueryResult] = {r.name: r for r in report.advised_results}
+
+    lines.extend(["", "Query latency (ms):"])
+    lines.append(f"  {'query':<28}{'p50':>10}{'p95':>10}{'max':>10}  full scans")
+
+    for result in report.results:
+        lines.append(
+            f"  {result.name:<28}{result.p50:>10.3f}{result.p95:>10.3f}"
+            f"{max(result.latencies):>10.3f}  {', '.join(result.full_scans) or '-'}"
+        )
+
+        if result.name in advised:
+            after: QueryResult = advised[result.name]
+            lines.append(
+                f"  {'  with suggested indexes':<28}{after.p50:>10.3f}"
+                f"{after.p95:>10.3f}{max(after.latencies):>10.3f}"
+                f"  {', '.join(after.full_scans) or '-'}"
+            )
+
+    lines.extend(["", "Query plans:"])
+
+    for result in report.results:
+        lines.append(f"  {result.name}:")
+        lines.extend(f"    {detail}" for detail in result.plan)
+
+        if result.name in advised:
+            lines.append("    with suggested indexes:")
+            lines.extend(f"      {detail}" for detail in advised[result.name].plan)
+
+    lines.extend(["", "Schema issues:"])
+
+    for issue in report.issues:
+        lines.append(f"  {issue.table}.{issue.column} {issue.description}")
+
+        if issue.suggestion:
+            lines.append(f"    {issue.suggestion}")
+
+    if not report.issues:
+        lines.append("  None")
+
+    return lines
+
+
+_SQLITE_TYPES: Final[dict[str, str]] = {
+    "uuid": "TEXT",
+    "text": "TEXT",
+    "int": "INTEGER",
+    "integer": "INTEGER",
+    "boolean": "INTEGER",
+}
+
+
+def _parse_table(name: str, body: str) -> Table:
+    table = Table(name)
+
+    for definition in _split_definitions(body):
+        words: list[str] = definition.split()
+
+        if definition.upper().startswith("PRIMARY KEY"):
+            columns: str = definition[
+                definition.index("(") + 1 : definition.rindex(")")
+            ]
+            table.primary_key = [c.strip() for c in columns.split(",")]
+
+            continue
+
+        upper: str = definition.upper()
+        references = _REFERENCES_PATTERN.search(definition)
+        default = _DEFAULT_PATTERN.search(definition)
+        column = Column(
+            name=words[0],
+            type=words[1].upper(),
+            primary_key="PRIMARY KEY" in upper,
+            unique="UNIQUE" in upper,
+            not_null="NOT NULL" in upper,
+            default=None if default is None else default[1],
+            references=None if references is None else (references[1], references[2]),
+        )
+        table.columns.append(column)
+
+        if column.primary_key:
+            table.primary_key = [column.name]
+
+    return table
+
+
+def _split_definitions(body: str) -> list[str]:
+    definitions: list[str] = []
+    depth: int = 0
+    current: list[str] = []
+
+    for character in body:
+        if character == "," and depth == 0:
+            definitions.append("".join(current).strip())
+            current = []
+
+            continue
+
+        depth += {"(": 1, ")": -1}.get(character, 0)
+        current.append(character)
+
+    definitions.append("".join(current).strip())
+
+    return [d for d in definitions if d]
+
+
+def _canonical_type(column_type: str) -> str:
+    return {"SERIAL": "INT", "INTEGER": "INT"}.get(column_type.upper(), column_type)
+
+
+def _index_statement(table: str, *columns: str, name: str | None = None) -> str:
+    if name is None:
+        # Mirrors the naming of the indexes already declared in the schemas,
+        # like "Idx_User_Sessions_User_Id".
+        words: list[str] = re.findall(r"[A-Z][a-z]*|[a-z]+", table)
+        words.extend(word.capitalize() for c in columns for word in c.split("_"))
+        name = "Idx_" + "_".join(words)
+
+    return f"CREATE INDEX {name} ON {table} ({', '.join(columns)});"
+
+
+def _batched(rows: Iterable[tuple], size: int) -> Iterator[list[tuple]]:
+    batch: list[tuple] = []
+
+    for row in rows:
+        batch.append(row)
+
+        if len(batch) >= size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def _synthetic_id(namespace: int, index: int) -> str:
+    return str(uuid.UUID(int=(namespace << 96) | index, version=4))
+
+
+def _content_source_ids() -> list[str]:
+    ids: list[str] = ["ludeon.rimworld"]
+    ids.extend(
+        f"ludeon.rimworld.{name}"
+        for name in ("royalty", "ideology", "biotech", "anomaly")
+    )
+    ids.extend(f"author{i}.mod{i}" for i in range(_CONTENT_SOURCE_COUNT - len(ids)))
+
+    return ids
+
+
+def _generate_content_sources(ids: list[str]) -> Iterator[tuple]:
+    for content_source_id in ids:
+        if content_source_id == "ludeon.rimworld":
+            source_type = "base"
+        elif content_source_id.startswith("ludeon."):
+            source_type = "expansion"
+        else:
+            source_type = "mod"
+
+        yield content_source_id, source_type, content_source_id.title()
+
+
+def _generate_users(count: int) -> Iterator[tuple]:
+    for i in range(count):
+        yield _synthetic_id(_USER_NAMESPACE, i), str(100_000_000 + i)
+
+
+def _generate_sessions(rng: random.Random, count: int, users: int) -> Iterator[tuple]:
+    for i in range(count):
+        yield (
+            _synthetic_id(_SESSION_NAMESPACE, i),
+            rng.choice(_GAME_VERSIONS),
+            _synthetic_id(_USER_NAMESPACE, rng.randrange(users)),
+            rng.random() < 0.1,
+            rng.choice((0, 60, 120, 300)),
+            rng.choice((0, 50, 100)),
+            rng.random() < 0.5,
+        )
+
+
+def _generate_user_sessions(
+    rng: random.Random, sessions: int, users: int, viewers: int
+) -> Iterator[tuple]:
+    for i in range(sessions):
+        session_id: str = _synthetic_id(_SESSION_NAMESPACE, i)
+        count: int = min(users, max(1, int(rng.expovariate(1 / viewers))))
+
+        for user in rng.sample(range(users), count):
+            yield session_id, _synthetic_id(_USER_NAMESPACE, user)
+
+
+def _generate_session_content_sources(
+    rng: random.Random, sessions: int, content_sources: list[str]
+) -> Iterator[tuple]:
+    for i in range(sessions):
+        session_id: str = _synthetic_id(_SESSION_NAMESPACE, i)
+        count: int = rng.randint(5, 60)
+
+        # Every session runs the base game, along with a random set of mods.
+        yield session_id, content_sources[0]
+
+        for content_source_id in rng.sample(content_sources[1:], count):
+            yield session_id, content_source_id
+
+
+def _generate_interactions(
+    rng: random.Random, count: int, sessions: int, content_sources: list[str]
+) -> Iterator[tuple]:
+    # Interactions are skewed towards the base game and expansions, as they
+    # provide most of the game's content.
+    weights: list[float] = [1 / (rank + 1) for rank in range(len(content_sources))]
+    chosen: list[str] = rng.choices(content_sources, weights, k=min(count, 100_000))
+
+    for i in range(count):
+        yield (
+            f"{i:012x}",
+            _synthetic_id(_SESSION_NAMESPACE, rng.randrange(sessions)),
+            chosen[i % len(chosen)],
+            rng.choice(_INTERACTION_NAMES),
+        )
+
+
+def _generate_products(
+    rng: random.Random, content_sources: list[str]
+) -> Iterator[tuple]:
+    for content_source_id in content_sources:
+        for i in range(_PRODUCTS_PER_CONTENT_SOURCE):
+            product_type: str = rng.choice(_PRODUCT_TYPES)
+            category: str | None = None
+
+            if product_type in ("item", "event"):
+                category = rng.choice(("Food", "Weapons", "Apparel", "Misc"))
+
+            yield content_source_id, f"{content_source_id}.Thing{i}", product_type, category
+
+
+def _query_mix(users: int, sessions: int, content_sources: list[str]) -> list[Query]:
+    def session(rng: random.Random) -> tuple:
+        return (_synthetic_id(_SESSION_NAMESPACE, rng.randrange(sessions)),)
+
+    def user(rng: random.Random) -> tuple:
+        return (_synthetic_id(_USER_NAMESPACE, rng.randrange(users)),)
+
+    def content_source(rng: random.Random) -> tuple:
+        return (rng.choice(content_sources),)
+
+    return [
+        Query(
+            "session_interactions",
+            "SELECT interaction_id, content_source_id, interaction_name"
+            " FROM Interactions WHERE session_id = %s",
+            session,
+            [("Interactions", "session_id")],
+        ),
+        Query(
+            "content_source_interactions",
+            "SELECT interaction_name, COUNT(*) FROM Interactions"
+            " WHERE content_source_id = %s GROUP BY interaction_name",
+            content_source,
+            [("Interactions", "content_source_id")],
+        ),
+        Query(
+            "session_viewers",
+            "SELECT u.user_id, u.twitch_id FROM UserSessions us"
+            " JOIN Users u ON u.user_id = us.user_id WHERE us.session_id = %s",
+            session,
+            [("UserSessions", "session_id")],
+        ),
+        Query(
+            "user_sessions",
+            "SELECT s.session_id, s.game_version FROM UserSessions us"
+            " JOIN Sessions s ON s.session_id = us.session_id WHERE us.user_id = %s",
+            user,
+            [("UserSessions", "user_id")],
+        ),
+        Query(
+            "hosted_sessions",
+            "SELECT session_id, game_version FROM Sessions WHERE user_id = %s",
+            user,
+            [("Sessions", "user_id")],
+        ),
+        Query(
+            "session_content_sources",
+            "SELECT cs.content_source_id, cs.content_source_name"
+            " FROM SessionContentSources scs JOIN ContentSources cs"
+            " ON cs.content_source_id = scs.content_source_id"
+            " WHERE scs.session_id = %s",
+            session,
+            [("SessionContentSources", "session_id")],
+        ),
+        Query(
+            "sessions_using_source",
+            "SELECT COUNT(*) FROM SessionContentSources WHERE content_source_id = %s",
+            content_source,
+            [("SessionContentSources", "content_source_id")],
+        ),
+        Query(
+            "user_by_twitch_id",
+            "SELECT user_id FROM Users WHERE twitch_id = %s",
+            lambda rng: (str(100_000_000 + rng.randrange(users)),),
+            [("Users", "twitch_id")],
+        ),
+        Query(
+            "content_source_products",
+            "SELECT product_id, product_type FROM Products"
+            " WHERE content_source_id = %s",
+            content_source,
+            [("Products", "content_source_id")],
+        ),
+    ]
+
+
+def _run_queries(
+    backend: SqliteBackend | PostgresBackend,
+    queries: list[Query],
+    rng: random.Random,
+    iterations: int,
+) -> list[QueryResult]:
+    results: list[QueryResult] = []
+
+    for query in queries:
+        sql: str = query.sql.replace("%s", backend.placeholder)
+        plan, full_scans = backend.explain(sql, query.parameters(rng))
+        latencies: list[float] = []
+
+        for _ in range(iterations):
+            parameters: tuple = query.parameters(rng)
+            started: float = time.perf_counter()
+            backend.execute(sql, parameters)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        results.append(QueryResult(query.name, latencies, plan, full_scans))
+
+    return results
@@ -0,0 +1,525 @@
+"""
+This file contains the `ArtifactStore` class, a content-addressed blob store
+that lives in a user-level directory so it can be shared between every
+worktree of the mod. Files are ingested into the store once, keyed by their
+SHA-256 digest, and materialized elsewhere through reflinks or hardlinks
+instead of being copied.
+"""
+
+import errno
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from platform import system
+from typing import Final
+from typing import Self
+
+__all__ = ["ArtifactStore", "StoreStatistics", "default_store_path"]
+
+STORE_PATH_VARIABLE: Final[str] = "STREAMKIT_STORE"
+INDEX_FILE_PATH: Final[Path] = Path(".run", ".store-index.json")
+
+_CHUNK_SIZE: Final[int] = 1024 * 1024
+_STALE_STAGING_AGE: Final[int] = 60 * 60 * 1_000_000_000
+_FICLONE: Final[int] = 0x40049409  # _IOW(0x94, 9, int), as defined in linux/fs.h
+
+
+def default_store_path() -> Path:
+    """Returns the directory the artifact store should live in.
+
+    Notes:
+        The location can be overridden by setting the "STREAMKIT_STORE"
+        environment variable. Otherwise, the store is placed in the platform's
+        conventional cache directory.
+    """
+    override: str | None = os.environ.get(STORE_PATH_VARIABLE)
+
+    if override:
+        return Path(override)
+
+    match system().casefold():
+        case "windows":
+            local_app_data: str | None = os.environ.get("LOCALAPPDATA")
+
+            if local_app_data:
+                return Path(local_app_data, "StreamKit", "store")
+
+            return Path.home().joinpath("AppData", "Local", "StreamKit", "store")
+        case "darwin":
+            return Path.home().joinpath("Library", "Caches", "StreamKit", "store")
+        case _:
+            cache_home: str | None = os.environ.get("XDG_CACHE_HOME")
+
+            if cache_home:
+                return Path(cache_home, "streamkit", "store")
+
+            return Path.home().joinpath(".cache", "streamkit", "store")
+
+
+@dataclass(slots=True)
+class StoreStatistics:
+    """Represents the outcome of a garbage collection pass over the store.
+
+    Attributes:
+        blobs:
+            The number of blobs that remain in the store.
+        size:
+            The total size, in bytes, of the blobs that remain in the store.
+        evicted:
+            The number of blobs that were removed from the store.
+        reclaimed:
+            The number of bytes that were freed by removing blobs.
+    """
+
+    blobs: int = 0
+    size: int = 0
+    evicted: int = 0
+    reclaimed: int = 0
+
+
+@dataclass(slots=True)
+class ArtifactStore:
+    """A content-addressed store of immutable blobs.
+
+    Attributes:
+        root:
+            The directory the store's blobs are kept in.
+        index_path:
+            The path to the file that caches the digests of files that were
+            previously ingested. The cache is keyed by a file's path, size, and
+            modification time, which allows unchanged files to skip hashing.
+
+    Notes:
+        Blobs are written to a unique temporary file first, then atomically
+        renamed into place. Since a blob's name is derived from its contents,
+        two writers racing to ingest the same file will always produce the same
+        blob, which makes the store safe for concurrent writers.
+
+        Blobs are marked read-only once they're in the store on platforms where
+        doing so doesn't also prevent them from being unlinked, as a hardlinked
+        file shares its contents with every other link to it. Anything that
+        wants to replace a materialized file must unlink it first. As tools
+        outside of the store can't be relied on to do so, a blob is checked
+        against its digest before it's reused, and replaced if it was written
+        to.
+    """
+
+    root: Path
+    index_path: Path = field(default=INDEX_FILE_PATH)
+    _index: dict[str, list] | None = field(default=None, init=False, repr=False)
+    _index_dirty: bool = field(default=False, init=False, repr=False)
+    _reflinks: bool | None = field(default=None, init=False, repr=False)
+
+    @classmethod
+    def create_instance(cls) -> Self:
+        """Creates a new instance of the `ArtifactStore` class at the default
+        store location, creating the store's directories if they don't exist.
+        """
+        instance: Self = cls(default_store_path())
+        instance.objects_path.mkdir(parents=True, exist_ok=True)
+        instance.temporary_path.mkdir(parents=True, exist_ok=True)
+
+        return instance
+
+    @property
+    def objects_path(self) -> Path:
+        """Returns the directory blobs are stored in."""
+        return self.root.joinpath("objects")
+
+    @property
+    def temporary_path(self) -> Path:
+        """Returns the directory blobs are staged in before being committed."""
+        return self.root.joinpath("tmp")
+
+    def blob_path(self, digest: str) -> Path:
+        """Returns the location of the blob with the given digest.
+
+        Args:
+            digest:
+                The hex-encoded SHA-256 digest of the blob.
+        """
+        return self.objects_path.joinpath(digest[:2], digest[2:])
+
+    def digest(self, path: Path) -> str:
+        """Returns the digest of the given file.
+
+        Args:
+            path:
+                The path to the file being hashed.
+        Notes:
+            If the file's size and modification time match the ones recorded in
+            the store's index, the recorded digest is returned without reading
+            the file.
+        """
+        stat = path.stat()
+        key: str = str(path.resolve())
+        index = self._load_index()
+        entry: list | None = index.get(key)
+
+        if (
+            entry is not None
+            and entry[0] == stat.st_size
+            and entry[1] == stat.st_mtime_ns
+        ):
+            return entry[2]
+
+        hasher = hashlib.sha256()
+
+        with path.open("rb") as f:
+            while chunk := f.read(_CHUNK_SIZE):
+                hasher.update(chunk)
+
+        digest: str = hasher.hexdigest()
+        index[key] = [stat.st_size, stat.st_mtime_ns, digest]
+        self._index_dirty = True
+
+        return digest
+
+    def put(self, path: Path) -> str:
+        """Ingests a file into the store, and returns its digest.
+
+        Args:
+            path:
+                The path to the file being ingested.
+        """
+        digest: str = self.digest(path)
+        blob_path: Path = self.blob_path(digest)
+
+        if blob_path.exists():
+            if self._verify(blob_path, digest):
+                self._touch(blob_path)
+
+                return digest
+
+            # The blob was written to through a hardlink, so it's replaced with
+            # the file's actual contents.
+            self._remove_blob(blob_path)
+
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        self.temporary_path.mkdir(parents=True, exist_ok=True)
+        staging_path: Path = self.temporary_path.joinpath(uuid.uuid4().hex)
+
+        try:
+            shutil.copyfile(path, staging_path)
+
+            if os.name != "nt":
+                staging_path.chmod(0o444)
+
+            os.replace(staging_path, blob_path)
+        except PermissionError:
+            # On Windows, replacing a blob another writer just committed fails
+            # while it's in use; the blob it committed has the same contents.
+            if not blob_path.exists():
+                raise
+        finally:
+            staging_path.unlink(missing_ok=True)
+
+        return digest
+
+    def materialize(
+        self, source: Path, destination: Path, *, hardlink: bool = True
+    ) -> Path:
+        """Places a copy of the given file at the destination, sourced from
+        the store.
+
+        This method is compatible with `shutil.copy`, which allows it to be
+        used as the `copy_function` of `shutil.copytree`.
+
+        Args:
+            source:
+                The path to the file being materialized. The file is ingested
+                into the store if it isn't already in it.
+            destination:
+                The path the file should be materialized at. If the path is a
+                directory, the file is placed inside it under its own name.
+            hardlink:
+                Whether the destination may be hardlinked to the blob. This
+                should only be allowed for destinations nothing but the build
+                scripts writes to, as writing to a hardlinked file writes to
+                the blob itself.
+        """
+        source = Path(source)
+        destination = Path(destination)
+
+        if destination.is_dir():
+            destination = destination.joinpath(source.name)
+
+        for _ in range(2):
+            blob_path: Path = self.blob_path(self.put(source))
+
+            if destination.exists():
+                if hardlink and _is_same_file(blob_path, destination):
+                    return destination
+
+                destination.unlink()
+
+            try:
+                _link(blob_path, destination, hardlink)
+            except FileNotFoundError:
+                # The blob was evicted between being ingested and linked.
+                if blob_path.exists() or not source.exists():
+                    raise
+
+                continue
+
+            return destination
+
+        raise FileNotFoundError(errno.ENOENT, "Blob was repeatedly evicted", source)
+
+    def move(self, source: Path, destination: Path) -> Path:
+        """Materializes the given file at the destination, then removes the
+        original file.
+
+        Args:
+            source:
+                The path to the file being moved.
+            destination:
+                The path, or directory, the file should be moved to.
+        """
+        result: Path = self.materialize(source, destination)
+        Path(source).unlink(missing_ok=True)
+
+        if self._load_index().pop(str(Path(source).resolve()), None) is not None:
+            self._index_dirty = True
+
+        return result
+
+    def is_same_volume(self, path: Path) -> bool:
+        """Returns whether the given path is on the same volume as the store.
+        Files can only be reflinked or hardlinked within a single volume, so
+        materializing files on another volume copies them out of the store.
+
+        Args:
+            path:
+                The path being checked, which doesn't need to exist yet.
+        """
+        path = Path(path).absolute()
+
+        while not path.exists() and path.parent != path:
+            path = path.parent
+
+        try:
+            return os.stat(path).st_dev == os.stat(self.root).st_dev
+        except OSError:
+            return False
+
+    def can_reflink_to(self, path: Path) -> bool:
+        """Returns whether files can be reflinked from the store to the given
+        path. Materializing files anywhere else copies them out of the store,
+        which costs more than copying the original files directly.
+
+        Args:
+            path:
+                The path being checked, which doesn't need to exist yet.
+        Notes:
+            Whether the store's file system supports reflinks is probed once,
+            by cloning a file within the store.
+        """
+        if not self.is_same_volume(path):
+            return False
+
+        if self._reflinks is None:
+            self._reflinks = self._probe_reflinks()
+
+        return self._reflinks
+
+    def collect_garbage(
+        self, max_size: int | None = None, max_blobs: int | None = None
+    ) -> StoreStatistics:
+        """Evicts the least recently used blobs until the store fits within
+        the given limits.
+
+        Args:
+            max_size:
+                The maximum total size, in bytes, the store's blobs may occupy.
+            max_blobs:
+                The maximum number of blobs the store may hold.
+        Notes:
+            A blob's access time is bumped every time it's ingested or
+            materialized, and serves as its "last used" time. Its modification
+            time is left alone, as it's shared with every file hardlinked from
+            it, and is used to detect whether those files changed. Evicting a blob
+            never affects files that were hardlinked from it, as the file
+            system keeps their contents alive until the last link is removed.
+
+            Blobs that can't be removed, like those hardlinked to an assembly
+            the game has loaded on Windows, are skipped.
+        """
+        blobs: list[tuple[int, int, Path]] = []
+        statistics = StoreStatistics()
+
+        if self.objects_path.exists():
+            for shard in os.scandir(self.objects_path):
+                if not shard.is_dir():
+                    continue
+
+                for entry in os.scandir(shard.path):
+                    stat = entry.stat()
+                    blobs.append((stat.st_atime_ns, stat.st_size, Path(entry.path)))
+                    statistics.size += stat.st_size
+
+        blobs.sort()
+        statistics.blobs = len(blobs)
+
+        for _, size, blob_path in blobs:
+            over_size: bool = max_size is not None and statistics.size > max_size
+            over_count: bool = max_blobs is not None and statistics.blobs > max_blobs
+
+            if not over_size and not over_count:
+                break
+
+            try:
+                self._remove_blob(blob_path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+
+            statistics.blobs -= 1
+            statistics.size -= size
+            statistics.evicted += 1
+            statistics.reclaimed += size
+
+        if self.temporary_path.exists():
+            cutoff: int = time.time_ns() - _STALE_STAGING_AGE
+            for entry in os.scandir(self.temporary_path):
+                # Staged files are left alone for a while, as they may belong to
+                # a writer that's still ingesting a file.
+                if entry.stat().st_mtime_ns < cutoff:
+                    Path(entry.path).unlink(missing_ok=True)
+
+        return statistics
+
+    def save_index(self):
+        """Saves the store's digest cache to disk, if it was changed.
+
+        Notes:
+            Entries for files that no longer exist, like ones that were moved
+            into the store or evicted from it, are discarded.
+        """
+        if not self._index_dirty or self._index is None:
+            return
+
+        for key in [key for key in self._index if not os.path.exists(key)]:
+            del self._index[key]
+
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        staging_path: Path = self.index_path.with_name(
+            f"{self.index_path.name}.{uuid.uuid4().hex}"
+        )
+
+        with staging_path.open("w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+
+        os.replace(staging_path, self.index_path)
+        self._index_dirty = False
+
+    def _load_index(self) -> dict[str, list]:
+        if self._index is not None:
+            return self._index
+
+        self._index = {}
+
+        if self.index_path.exists():
+            try:
+                with self.index_path.open("r", encoding="utf-8") as f:
+                    self._index = json.load(f)
+            except (ValueError, OSError):
+                self._index = {}
+
+        return self._index
+
+    def _verify(self, blob_path: Path, digest: str) -> bool:
+        try:
+            return self.digest(blob_path) == digest
+        except FileNotFoundError:
+            return False
+
+    def _probe_reflinks(self) -> bool:
+        self.temporary_path.mkdir(parents=True, exist_ok=True)
+        probe_path: Path = self.temporary_path.joinpath(uuid.uuid4().hex)
+        clone_path: Path = probe_path.with_suffix(".clone")
+
+        try:
+            probe_path.write_bytes(b"\0")
+
+            return _reflink(probe_path, clone_path)
+        except OSError:
+            return False
+        finally:
+            probe_path.unlink(missing_ok=True)
+            clone_path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _remove_blob(blob_path: Path):
+        blob_path.chmod(0o644)
+        blob_path.unlink()
+
+    @staticmethod
+    def _touch(blob_path: Path):
+        try:
+            stat = blob_path.stat()
+            os.utime(blob_path, ns=(time.time_ns(), stat.st_mtime_ns))
+        except PermissionError:
+            # Read-only files can't have their times changed on some platforms.
+            pass
+
+
+def _is_same_file(left: Path, right: Path) -> bool:
+    try:
+        return left.samefile(right)
+    except OSError:
+        return False
+
+
+def _link(blob_path: Path, destination: Path, hardlink: bool):
+    """Links the blob to the destination through a reflink, then a hardlink if
+    allowed, falling back to a regular copy if neither are supported.
+    """
+    destination.parent.mkdir(parents=True, exist_ok=True)
+
+    if _reflink(blob_path, destination):
+        return
+
+    if not hardlink:
+        shutil.copyfile(blob_path, destination)
+
+        return
+
+    try:
+        os.link(blob_path, destination)
+
+        return
+    except FileNotFoundError:
+        raise
+    except OSError:
+        # Hardlinks can't cross volumes, and aren't supported everywhere.
+        pass
+
+    shutil.copyfile(blob_path, destination)
+
+
+def _reflink(blob_path: Path, destination: Path) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+
+    with blob_path.open("rb") as source_file:
+        with destination.open("wb") as destination_file:
+            try:
+                fcntl.ioctl(destination_file.fileno(), _FICLONE, source_file.fileno())
+
+                return True
+            except OSError:
+                pass
+
+    destination.unlink(missing_ok=True)
+
+    return False
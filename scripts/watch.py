@@ -0,0 +1,374 @@
+"""
+Contains watchers that report changes made to a set of files and directories.
+On Linux, changes are reported by inotify; everywhere else, the watched paths
+are periodically scanned for changes instead.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from abc import ABC
+from abc import abstractmethod
+from collections.abc import Iterator
+from pathlib import Path
+from platform import system
+from typing import Final
+
+__all__ = [
+    "Watcher",
+    "InotifyWatcher",
+    "PollingWatcher",
+    "create_watcher",
+    "debounce",
+]
+
+_IN_MODIFY: Final[int] = 0x00000002
+_IN_ATTRIB: Final[int] = 0x00000004
+_IN_CLOSE_WRITE: Final[int] = 0x00000008
+_IN_MOVED_FROM: Final[int] = 0x00000040
+_IN_MOVED_TO: Final[int] = 0x00000080
+_IN_CREATE: Final[int] = 0x00000100
+_IN_DELETE: Final[int] = 0x00000200
+_IN_DELETE_SELF: Final[int] = 0x00000400
+_IN_Q_OVERFLOW: Final[int] = 0x00004000
+_IN_IGNORED: Final[int] = 0x00008000
+_IN_ISDIR: Final[int] = 0x40000000
+_IN_NONBLOCK: Final[int] = 0o4000
+_IN_CLOEXEC: Final[int] = 0o2000000
+
+_WATCH_MASK: Final[int] = (
+    _IN_MODIFY
+    | _IN_ATTRIB
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_DELETE_SELF
+)
+_EVENT_HEADER: Final[struct.Struct] = struct.Struct("iIII")
+
+
+class Watcher(ABC):
+    """The base class for all watchers.
+
+    Attributes:
+        directories:
+            The directories being watched, including all of their descendants.
+        files:
+            The individual files being watched.
+        overflowed:
+            Whether changes were lost since the flag was last cleared, as more
+            changes were made than the watcher could keep track of. Whoever
+            relies on every change being reported must clear the flag, and
+            rescan the watched paths, when it's set.
+    """
+
+    name: str = "watcher"
+
+    def __init__(self, directories: list[Path], files: list[Path]):
+        self.directories: list[Path] = directories
+        self.files: list[Path] = files
+        self.overflowed: bool = False
+
+    @abstractmethod
+    def wait(self, timeout: float | None) -> set[Path]:
+        """Waits for changes to be made to the watched paths.
+
+        Args:
+            timeout:
+                The number of seconds to wait for a change before giving up, or
+                `None` to wait indefinitely.
+        Returns:
+            The paths that changed, which is empty if the timeout elapsed.
+        """
+
+    def close(self):
+        """Releases any resources held by the watcher."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class PollingWatcher(Watcher):
+    """A watcher that periodically scans the watched paths for changes.
+
+    Attributes:
+        interval:
+            The number of seconds between each scan.
+    """
+
+    name: str = "polling"
+
+    def __init__(
+        self, directories: list[Path], files: list[Path], interval: float = 0.25
+    ):
+        super().__init__(directories, files)
+
+        self.interval: float = interval
+        self._snapshot: dict[str, tuple[int, int]] = self._scan()
+
+    def wait(self, timeout: float | None) -> set[Path]:
+        deadline: float | None = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            snapshot: dict[str, tuple[int, int]] = self._scan()
+            changes: set[Path] = {
+                Path(path)
+                for path in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = snapshot
+
+            if changes:
+                return changes
+
+            if deadline is not None:
+                remaining: float = deadline - time.monotonic()
+
+                if remaining <= 0:
+                    return set()
+
+                time.sleep(min(self.interval, remaining))
+            else:
+                time.sleep(self.interval)
+
+    def _scan(self) -> dict[str, tuple[int, int]]:
+        snapshot: dict[str, tuple[int, int]] = {}
+
+        for file in self.files:
+            try:
+                stat = os.stat(file)
+            except FileNotFoundError:
+                continue
+
+            snapshot[str(file)] = (stat.st_size, stat.st_mtime_ns)
+
+        pending: list[str] = [str(directory) for directory in self.directories]
+
+        while pending:
+            try:
+                entries = os.scandir(pending.pop())
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+
+                        continue
+
+                    try:
+                        stat = entry.stat(follow_symlinks=False)
+                    except FileNotFoundError:
+                        continue
+
+                    snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+
+        return snapshot
+
+
+class InotifyWatcher(Watcher):
+    """A watcher that's notified of changes by the Linux kernel."""
+
+    name: str = "inotify"
+
+    def __init__(self, directories: list[Path], files: list[Path]):
+        super().__init__(directories, files)
+
+        self._libc = _load_libc()
+        self._fd: int = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "Could not initialize inotify")
+
+        self._descriptors: dict[int, Path] = {}
+        self._files: set[Path] = set(files)
+
+        for directory in directories:
+            self._add_tree(directory)
+
+        # Individual files are watched through their parent directory, as most
+        # tools replace files instead of writing to them in place.
+        for parent in {file.parent for file in files}:
+            self._add_watch(parent)
+
+    def wait(self, timeout: float | None) -> set[Path]:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+
+        if not readable:
+            return set()
+
+        changes: set[Path] = set()
+
+        while True:
+            try:
+                buffer: bytes = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+
+            changes.update(self._parse_events(buffer))
+
+        return changes
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _parse_events(self, buffer: bytes) -> set[Path]:
+        changes: set[Path] = set()
+        offset: int = 0
+
+        while offset < len(buffer):
+            descriptor, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name: bytes = buffer[offset : offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & _IN_Q_OVERFLOW:
+                # The kernel dropped events, so which paths changed is unknown,
+                # and watches for directories created since may be missing.
+                self.overflowed = True
+                changes.update(self.directories)
+                changes.update(self._files)
+
+                for directory in self.directories:
+                    self._add_tree(directory)
+
+                continue
+
+            parent: Path | None = self._descriptors.get(descriptor)
+
+            if parent is None:
+                continue
+
+            if mask & _IN_IGNORED:
+                del self._descriptors[descriptor]
+
+                continue
+
+            path: Path = parent.joinpath(os.fsdecode(name)) if name else parent
+
+            if not self._is_watched(path):
+                continue
+
+            if mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO):
+                # Files may have been created in the directory before the watch
+                # was added, so they're all reported as changes.
+                self._add_tree(path)
+                changes.update(
+                    Path(root, file)
+                    for root, _, files in os.walk(path)
+                    for file in files
+                )
+
+            changes.add(path)
+
+        return changes
+
+    def _is_watched(self, path: Path) -> bool:
+        if path in self._files:
+            return True
+
+        return any(path.is_relative_to(d) for d in self.directories)
+
+    def _add_tree(self, directory: Path):
+        if not directory.is_dir():
+            return
+
+        self._add_watch(directory)
+
+        for root, directories, _ in os.walk(directory):
+            for name in directories:
+                self._add_watch(Path(root, name))
+
+    def _add_watch(self, directory: Path):
+        descriptor: int = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(directory), _WATCH_MASK
+        )
+
+        if descriptor >= 0:
+            self._descriptors[descriptor] = directory
+
+
+def create_watcher(
+    directories: list[Path], files: list[Path], poll_interval: float = 0.25
+) -> Watcher:
+    """Creates the most efficient watcher supported by the current platform.
+
+    Args:
+        directories:
+            The directories to watch, including all of their descendants.
+        files:
+            The individual files to watch.
+        poll_interval:
+            The number of seconds between each scan, if the platform doesn't
+            support change notifications.
+    """
+    if system().casefold() == "linux":
+        try:
+            return InotifyWatcher(directories, files)
+        except OSError:
+            pass
+
+    return PollingWatcher(directories, files, poll_interval)
+
+
+def debounce(
+    watcher: Watcher, quiet_period: float = 0.15, max_delay: float = 2.0
+) -> Iterator[set[Path]]:
+    """Groups bursts of changes reported by a watcher into a single batch.
+
+    Args:
+        watcher:
+            The watcher whose changes are being grouped.
+        quiet_period:
+            The number of seconds without any changes that ends a burst.
+        max_delay:
+            The maximum number of seconds a burst may be held for before it's
+            reported, regardless of whether changes are still being made.
+    """
+    while True:
+        changes: set[Path] = watcher.wait(None)
+
+        if not changes:
+            continue
+
+        deadline: float = time.monotonic() + max_delay
+
+        while (remaining := deadline - time.monotonic()) > 0:
+            more: set[Path] = watcher.wait(min(quiet_period, remaining))
+
+            if not more:
+                break
+
+            changes.update(more)
+
+        yield changes
+
+
+def _load_libc() -> ctypes.CDLL:
+    library: str | None = ctypes.util.find_library("c")
+
+    if library is None:
+        raise OSError("Could not locate the C library")
+
+    libc = ctypes.CDLL(library, use_errno=True)
+
+    if not hasattr(libc, "inotify_init1"):
+        raise OSError("The C library doesn't support inotify")
+
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_init1.restype = ctypes.c_int
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    libc.inotify_add_watch.restype = ctypes.c_int
+
+    return libc